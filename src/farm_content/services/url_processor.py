@@ -76,7 +76,7 @@ class URLProcessorService:
         """Получение информации о видео."""
         try:
             with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = await asyncio.get_event_loop().run_in_executor(
+                info = await asyncio.get_running_loop().run_in_executor(
                     None, ydl.extract_info, url, False
                 )
 
@@ -125,14 +125,16 @@ class URLProcessorService:
 
                 opts["progress_hooks"] = [progress_hook]
 
+            loop = asyncio.get_running_loop()
+
             with yt_dlp.YoutubeDL(opts) as ydl:
                 # Получаем информацию для имени файла
-                info = await asyncio.get_event_loop().run_in_executor(
+                info = await loop.run_in_executor(
                     None, ydl.extract_info, url, False
                 )
 
                 # Загружаем видео
-                await asyncio.get_event_loop().run_in_executor(
+                await loop.run_in_executor(
                     None, ydl.download, [url]
                 )
 
@@ -4,17 +4,85 @@
 
 import asyncio
 import json
+from bisect import bisect_left, insort
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import cv2
 import numpy as np
 from moviepy.video.io.VideoFileClip import VideoFileClip
 
+# PyAV опционален: без него кадры читаются через get_frame MoviePy
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
 from farm_content.core import VideoProcessingError, get_logger
 
 logger = get_logger(__name__)
 
 
+def _overlaps_intervals(
+    intervals: List[Tuple[float, float]], start: float, end: float
+) -> bool:
+    """Проверка пересечения отрезка с уже выбранными.
+
+    ``intervals`` - отсортированные непересекающиеся отрезки, поэтому
+    достаточно проверить двух соседей.
+    """
+    idx = bisect_left(intervals, (start, end))
+    if idx > 0 and intervals[idx - 1][1] > start:
+        return True
+    return idx < len(intervals) and intervals[idx][0] < end
+
+
+def _iter_frames_at(
+    video: VideoFileClip, times: np.ndarray
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """RGB-кадры в моменты ``times`` (по возрастанию).
+
+    С PyAV файл декодируется один раз, последовательно и в пуле потоков
+    libavcodec; в numpy переводятся только нужные кадры. Как и get_frame,
+    для момента t берется последний кадр, начавшийся не позже t.
+    Выгодно только для частой выборки: для редких моментов дешевле get_frame.
+    """
+    if not AV_AVAILABLE:
+        for t in times:
+            yield t, video.get_frame(t)
+        return
+
+    with av.open(video.filename) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        idx = 0
+        prev_frame = None
+        prev_image = None
+        for frame in container.decode(stream):
+            if frame.time is None:
+                continue
+            while idx < len(times) and frame.time > times[idx] + 1e-6:
+                # Моменты до первого кадра получают первый кадр
+                if prev_frame is None:
+                    prev_frame = frame
+                if prev_image is None:
+                    prev_image = prev_frame.to_ndarray(format="rgb24")
+                yield times[idx], prev_image
+                idx += 1
+            if idx >= len(times):
+                return
+            if prev_frame is not frame:
+                prev_frame, prev_image = frame, None
+
+        # Моменты после последнего кадра получают последний кадр
+        if prev_frame is not None and idx < len(times):
+            image = prev_frame.to_ndarray(format="rgb24")
+            for t in times[idx:]:
+                yield t, image
+
+
 class AdvancedVideoAnalyzer:
     """Продвинутый анализатор видео для создания вирусного контента."""
 
@@ -111,10 +179,11 @@ class AdvancedVideoAnalyzer:
                     video, start_time, end_time
                 )
                 
-                # Анализ аудио энергии
-                audio_energy = 0.0
+                # Анализ аудио энергии (и пика - по нему нарезка решает,
+                # нужна ли нормализация громкости)
+                audio_energy, audio_peak = 0.0, None
                 if video.audio:
-                    audio_energy = await self._calculate_audio_energy(
+                    audio_energy, audio_peak = await self._calculate_audio_energy(
                         video, start_time, end_time
                     )
                 
@@ -127,6 +196,7 @@ class AdvancedVideoAnalyzer:
                     "energy": combined_energy,
                     "motion": motion_energy,
                     "audio": audio_energy,
+                    "audio_peak": audio_peak,
                 })
                 
                 # Определение пиков
@@ -165,8 +235,9 @@ class AdvancedVideoAnalyzer:
                 frame = video.get_frame(t)
                 
                 if prev_frame is not None:
-                    # Вычисляем оптический поток (упрощенно)
-                    diff = np.mean(np.abs(frame.astype(float) - prev_frame.astype(float)))
+                    # Вычисляем оптический поток (упрощенно): разность uint8
+                    # кадров в OpenCV (SIMD), без копий во float64
+                    diff = cv2.absdiff(frame, prev_frame).mean()
                     motion_values.append(diff / 255.0)  # Нормализация
                 
                 prev_frame = frame
@@ -179,28 +250,33 @@ class AdvancedVideoAnalyzer:
 
     async def _calculate_audio_energy(
         self, video: VideoFileClip, start_time: float, end_time: float
-    ) -> float:
-        """Расчет энергии аудио в сегменте."""
+    ) -> Tuple[float, Optional[float]]:
+        """Расчет энергии аудио в сегменте.
+
+        Возвращает (энергия, пиковая амплитуда); пик None, если не измерен.
+        """
         try:
             if not video.audio:
-                return 0.0
+                return 0.0, None
                 
             # Получаем аудио сегмент
             audio_segment = video.audio.subclip(start_time, end_time)
             audio_array = audio_segment.to_soundarray()
             
             if len(audio_array) == 0:
-                return 0.0
+                return 0.0, None
             
-            # RMS энергия
-            rms = np.sqrt(np.mean(audio_array**2))
+            # RMS энергия одной редукцией, без временного массива квадратов
+            samples = audio_array.ravel()
+            rms = np.sqrt(np.dot(samples, samples) / len(samples))
+            peak = float(max(samples.max(), -samples.min()))
             
             # Нормализация (примерная)
-            return min(rms * 10, 1.0)
+            return min(rms * 10, 1.0), peak
             
         except Exception as e:
             logger.warning(f"Ошибка расчета аудио энергии: {e}")
-            return 0.0
+            return 0.0, None
 
     async def _analyze_emotional_content(self, video: VideoFileClip) -> Dict[str, Any]:
         """Анализ эмоциональной составляющей."""
@@ -234,12 +310,12 @@ class AdvancedVideoAnalyzer:
             sample_times = np.linspace(0, video.duration, 10)
             color_data = []
             
+            sample_times = sample_times[sample_times < video.duration]
+            
+            # 10 редких моментов: отдельный get_frame на каждый дешевле,
+            # чем декодировать весь файл
             for t in sample_times:
-                if t >= video.duration:
-                    continue
-                    
                 frame = video.get_frame(t)
-                
                 # Анализ HSV
                 from moviepy.video.fx.resize import resize
                 small_frame = resize(frame, 0.1)  # Уменьшаем для скорости
@@ -300,13 +376,11 @@ class AdvancedVideoAnalyzer:
             prev_frame = None
             threshold = 30.0  # Порог для определения смены сцены
             
-            # Анализируем каждые 0.5 секунды
-            for t in np.arange(0, video.duration, 0.5):
-                frame = video.get_frame(t)
-                
+            # Анализируем каждые 0.5 секунды, за один проход по файлу
+            for t, frame in _iter_frames_at(video, np.arange(0, video.duration, 0.5)):
                 if prev_frame is not None:
-                    # Вычисляем разность
-                    diff = np.mean(np.abs(frame.astype(float) - prev_frame.astype(float)))
+                    # Вычисляем разность (uint8, SIMD в OpenCV)
+                    diff = cv2.absdiff(frame, prev_frame).mean()
                     
                     if diff > threshold:
                         changes.append(t)
@@ -321,16 +395,22 @@ class AdvancedVideoAnalyzer:
 
     async def _analyze_visual_elements(self, video: VideoFileClip) -> Dict[str, Any]:
         """Анализ визуальных элементов."""
+        # Средний кадр декодируем один раз: после прохода по сценам ридер
+        # стоит в конце файла, и каждое чтение середины - это новая перемотка
+        try:
+            frame = video.get_frame(video.duration / 2)
+        except Exception:
+            frame = None
+
         return {
-            "contrast_level": await self._analyze_contrast(video),
+            "contrast_level": await self._analyze_contrast(frame),
             "composition_quality": await self._analyze_composition(video),
-            "visual_complexity": await self._analyze_complexity(video),
+            "visual_complexity": await self._analyze_complexity(frame),
         }
 
-    async def _analyze_contrast(self, video: VideoFileClip) -> float:
+    async def _analyze_contrast(self, frame: Optional[np.ndarray]) -> float:
         """Анализ контрастности."""
         try:
-            frame = video.get_frame(video.duration / 2)
             gray = np.dot(frame[..., :3], [0.2989, 0.5870, 0.1140])
             return np.std(gray) / 255.0
         except:
@@ -341,10 +421,9 @@ class AdvancedVideoAnalyzer:
         # Пока возвращаем средний балл
         return 0.7
 
-    async def _analyze_complexity(self, video: VideoFileClip) -> float:
+    async def _analyze_complexity(self, frame: Optional[np.ndarray]) -> float:
         """Анализ визуальной сложности."""
         try:
-            frame = video.get_frame(video.duration / 2)
             # Используем стандартное отклонение как меру сложности
             complexity = np.std(frame) / 255.0
             return min(complexity * 2, 1.0)
@@ -357,15 +436,25 @@ class AdvancedVideoAnalyzer:
             return {"has_audio": False, "audio_quality": 0.0, "speech_detected": False}
         
         try:
-            # Упрощенный анализ аудио
-            audio_array = video.audio.to_soundarray()
+            # Упрощенный анализ аудио: дорожка читается посекундно, RMS
+            # накапливается на лету, без материализации всего аудио в памяти
+            sum_squares = 0.0
+            sample_count = 0
+            head = None
+            for chunk in video.audio.iter_chunks(chunksize=int(video.audio.fps)):
+                if head is None:
+                    head = chunk
+                samples = chunk.ravel()
+                sum_squares += float(np.dot(samples, samples))
+                sample_count += len(samples)
             
             # Качество аудио (по RMS)
-            rms = np.sqrt(np.mean(audio_array**2))
+            rms = np.sqrt(sum_squares / sample_count) if sample_count else 0.0
             audio_quality = min(rms * 5, 1.0)
             
-            # Детекция речи (упрощенно - по спектральным характеристикам)
-            speech_detected = self._detect_speech_simple(audio_array)
+            # Детекция речи (упрощенно - по спектральным характеристикам
+            # начала дорожки)
+            speech_detected = head is not None and self._detect_speech_simple(head)
             
             return {
                 "has_audio": True,
@@ -495,21 +584,19 @@ class AdvancedVideoAnalyzer:
                 end = min(segment["end"], start + target_duration)
                 
                 # Проверяем пересечение
-                overlaps = any(
-                    not (end <= used_start or start >= used_end)
-                    for used_start, used_end in used_intervals
-                )
+                overlaps = _overlaps_intervals(used_intervals, start, end)
                 
                 if not overlaps and segment["energy"] > pattern["audio_threshold"]:
                     clip_info = {
                         "energy": segment["energy"],
                         "motion": segment["motion"],
                         "audio": segment["audio"],
+                        "audio_peak": segment.get("audio_peak"),
                         "viral_potential": self._calculate_clip_viral_potential(segment, analysis),
                     }
                     
                     clips.append((start, end, clip_info))
-                    used_intervals.append((start, end))
+                    insort(used_intervals, (start, end))
             
             # Если недостаточно клипов, добавляем равномерно распределенные
             if len(clips) < clips_count:
@@ -547,7 +634,11 @@ class AdvancedVideoAnalyzer:
         duration: int,
         used_intervals: List[Tuple[float, float]]
     ) -> List[Tuple[float, float, Dict[str, Any]]]:
-        """Получение дополнительных клипов равномерным распределением."""
+        """Получение дополнительных клипов равномерным распределением.
+
+        ``used_intervals`` должен быть отсортирован; новые отрезки
+        вставляются в него с сохранением порядка.
+        """
         clips = []
         
         try:
@@ -566,10 +657,7 @@ class AdvancedVideoAnalyzer:
                     end = start + duration
                     
                     # Проверяем пересечение
-                    overlaps = any(
-                        not (end <= used_start or start >= used_end)
-                        for used_start, used_end in used_intervals
-                    )
+                    overlaps = _overlaps_intervals(used_intervals, start, end)
                     
                     if not overlaps:
                         clip_info = {
@@ -579,7 +667,7 @@ class AdvancedVideoAnalyzer:
                             "viral_potential": 0.4,
                         }
                         clips.append((start, end, clip_info))
-                        used_intervals.append((start, end))
+                        insort(used_intervals, (start, end))
                     
                     attempts += 1
                 
@@ -343,8 +343,15 @@ class MovieClipGenerator:
         
         try:
             if platform in ["instagram", "tiktok"]:
-                # 9:16 для вертикальных видео
-                clip = clip.resize(height=1920).crop(width=1080)
+                # 9:16 для вертикальных видео: сначала кроп в исходных пикселях,
+                # затем один resize - масштабируется только видимая часть кадра
+                w, h = clip.size
+                crop_w = min(w, int(h * 9 / 16))
+                if crop_w < w:
+                    clip = clip.crop(x1=(w - crop_w) // 2, width=crop_w)
+                    clip = clip.resize((1080, 1920))
+                else:
+                    clip = clip.resize(height=1920)
             
             elif platform == "youtube":
                 # 16:9 для YouTube Shorts (можно оставить как есть или обрезать)
@@ -5,6 +5,7 @@
 import asyncio
 import json
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -404,9 +405,10 @@ class TextElementsGenerator:
                     final_video = CompositeVideoClip([video] + caption_clips)
                     
                     # Сохраняем
-                    await asyncio.get_event_loop().run_in_executor(
+                    await asyncio.get_running_loop().run_in_executor(
                         None,
-                        lambda: final_video.write_videofile(
+                        partial(
+                            final_video.write_videofile,
                             str(output_path),
                             codec="libx264",
                             audio_codec="aac",
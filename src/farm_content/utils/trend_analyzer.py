@@ -3,8 +3,10 @@ AI-анализ трендов и автоматическая адаптаци
 """
 
 import asyncio
+import gzip
 import json
 import random
+from bisect import bisect_left
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -12,8 +14,23 @@ from typing import Any, Dict, List, Optional, Tuple
 import requests
 from farm_content.core import VideoProcessingError, get_logger
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = get_logger(__name__)
 
+# Пороги трендового рейтинга и шаблоны рекомендаций (по возрастанию рейтинга)
+_THEME_SCORE_THRESHOLDS = (0.7, 0.8, 0.9)
+_THEME_RECOMMENDATION_TEMPLATES = (
+    "⚠️ Осторожно: {0} теряет актуальность",
+    "💡 Стабильный выбор: {0} всегда работает",
+    "📈 Растущий тренд: {0} набирает популярность",
+    "🔥 Горячий тренд! {0} показывает отличные результаты",
+)
+
 
 class TrendAnalyzer:
     """Анализатор трендов в социальных сетях с AI-адаптацией."""
@@ -238,14 +255,8 @@ class TrendAnalyzer:
     def _get_theme_recommendation(self, theme: str, data: Dict[str, Any]) -> str:
         """Генерация рекомендации для темы."""
         
-        if data["score"] > 0.9:
-            return f"🔥 Горячий тренд! {theme} показывает отличные результаты"
-        elif data["score"] > 0.8:
-            return f"📈 Растущий тренд: {theme} набирает популярность"
-        elif data["score"] > 0.7:
-            return f"💡 Стабильный выбор: {theme} всегда работает"
-        else:
-            return f"⚠️ Осторожно: {theme} теряет актуальность"
+        index = bisect_left(_THEME_SCORE_THRESHOLDS, data["score"])
+        return _THEME_RECOMMENDATION_TEMPLATES[index].format(theme)
 
     async def _generate_trend_recommendations(
         self, 
@@ -350,48 +361,105 @@ class TrendAnalyzer:
         self.logger.info(f"🎯 Адаптация контента под тренды {target_platform}")
         
         try:
-            adaptation_plan = {
-                "original_analysis": content_analysis,
-                "applied_trends": [],
-                "style_adjustments": {},
-                "content_modifications": {},
-                "estimated_improvement": 0.0
-            }
-            
-            # Анализ совместимости с трендами
-            compatibility_score = await self._calculate_trend_compatibility(
-                content_analysis, trends_analysis, target_platform
-            )
-            
-            # Применение визуальных трендов
-            visual_adaptations = await self._apply_visual_trends(
-                content_analysis, trends_analysis, target_platform
-            )
-            adaptation_plan["style_adjustments"] = visual_adaptations
-            
-            # Контентные модификации
-            content_modifications = await self._apply_content_trends(
-                content_analysis, trends_analysis
+            trend_context = await self._build_trend_context(
+                trends_analysis, target_platform
             )
-            adaptation_plan["content_modifications"] = content_modifications
+            return await self._adapt_one(content_analysis, trend_context)
             
-            # Расчёт ожидаемого улучшения
-            improvement = await self._estimate_trend_improvement(
-                compatibility_score, visual_adaptations, content_modifications
+        except Exception as e:
+            logger.error(f"Ошибка адаптации контента: {e}")
+            raise VideoProcessingError(f"Не удалось адаптировать контент: {e}")
+
+    async def adapt_batch(
+        self,
+        contents: List[Dict[str, Any]],
+        trends_analysis: Dict[str, Any],
+        target_platform: str = "tiktok"
+    ) -> List[Dict[str, Any]]:
+        """Пакетная адаптация нескольких видео под тренды одной платформы.
+        
+        Трендовая часть (стили платформы, топ темы, визуальные адаптации)
+        рассчитывается один раз на весь пакет.
+        """
+        
+        self.logger.info(
+            f"🎯 Пакетная адаптация {len(contents)} видео под тренды {target_platform}"
+        )
+        
+        try:
+            trend_context = await self._build_trend_context(
+                trends_analysis, target_platform
             )
-            adaptation_plan["estimated_improvement"] = improvement
-            
-            return adaptation_plan
+            return [
+                await self._adapt_one(content_analysis, trend_context)
+                for content_analysis in contents
+            ]
             
         except Exception as e:
-            logger.error(f"Ошибка адаптации контента: {e}")
+            logger.error(f"Ошибка пакетной адаптации контента: {e}")
             raise VideoProcessingError(f"Не удалось адаптировать контент: {e}")
 
-    async def _calculate_trend_compatibility(
+    async def _build_trend_context(
         self,
-        content_analysis: Dict[str, Any],
         trends_analysis: Dict[str, Any],
         platform: str
+    ) -> Dict[str, Any]:
+        """Предрасчёт трендовых данных, общих для всех видео платформы."""
+        
+        platform_trends = trends_analysis.get("trending_styles", {}).get(platform, {})
+        content_themes = trends_analysis.get("content_themes", {})
+        
+        return {
+            "visual_styles": platform_trends.get("visual_styles", []),
+            "optimal_duration": platform_trends.get("trending_duration", 30),
+            "content_themes": content_themes,
+            "visual_adaptations": await self._apply_visual_trends(platform_trends),
+            "narrative_structure": self._get_narrative_structure(content_themes),
+        }
+
+    async def _adapt_one(
+        self,
+        content_analysis: Dict[str, Any],
+        trend_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Адаптация одного видео по предрассчитанному трендовому контексту."""
+        
+        adaptation_plan = {
+            "original_analysis": content_analysis,
+            "applied_trends": [],
+            "style_adjustments": {},
+            "content_modifications": {},
+            "estimated_improvement": 0.0
+        }
+        
+        # Анализ совместимости с трендами
+        compatibility_score = await self._calculate_trend_compatibility(
+            content_analysis, trend_context
+        )
+        
+        # Применение визуальных трендов (копия, чтобы планы не делили состояние)
+        visual_adaptations = {
+            key: value.copy()
+            for key, value in trend_context["visual_adaptations"].items()
+        }
+        adaptation_plan["style_adjustments"] = visual_adaptations
+        
+        # Контентные модификации
+        content_modifications = await self._apply_content_trends(trend_context)
+        adaptation_plan["content_modifications"] = content_modifications
+        
+        # Расчёт ожидаемого улучшения
+        improvement = await self._estimate_trend_improvement(
+            compatibility_score, visual_adaptations, content_modifications
+        )
+        adaptation_plan["estimated_improvement"] = improvement
+        
+        return adaptation_plan
+
+    async def _calculate_trend_compatibility(
+        self,
+        content_analysis: Dict[str, Any],
+        trend_context: Dict[str, Any]
     ) -> float:
         """Расчёт совместимости контента с трендами."""
         
@@ -400,8 +468,7 @@ class TrendAnalyzer:
             
             # Совместимость с визуальными стилями
             content_style = content_analysis.get("visual_style", "unknown")
-            platform_trends = trends_analysis["trending_styles"].get(platform, {})
-            visual_styles = platform_trends.get("visual_styles", [])
+            visual_styles = trend_context["visual_styles"]
             
             style_match = any(
                 style["name"] == content_style or 
@@ -414,7 +481,7 @@ class TrendAnalyzer:
             content_type = content_analysis.get("content_type", "unknown")
             theme_scores = [
                 data["trending_score"] 
-                for theme, data in trends_analysis["content_themes"].items()
+                for theme, data in trend_context["content_themes"].items()
                 if theme in content_type or content_type in theme
             ]
             
@@ -425,7 +492,7 @@ class TrendAnalyzer:
             
             # Длительность контента
             content_duration = content_analysis.get("duration", 30)
-            optimal_duration = platform_trends.get("trending_duration", 30)
+            optimal_duration = trend_context["optimal_duration"]
             
             duration_factor = 1.0 - min(abs(content_duration - optimal_duration) / optimal_duration, 0.5)
             compatibility_factors.append(duration_factor)
@@ -439,9 +506,7 @@ class TrendAnalyzer:
 
     async def _apply_visual_trends(
         self,
-        content_analysis: Dict[str, Any],
-        trends_analysis: Dict[str, Any],
-        platform: str
+        platform_trends: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Применение визуальных трендов."""
         
@@ -453,8 +518,6 @@ class TrendAnalyzer:
         }
         
         try:
-            platform_trends = trends_analysis["trending_styles"].get(platform, {})
-            
             # Рекомендации по цветам
             top_styles = platform_trends.get("visual_styles", [])
             if top_styles:
@@ -490,45 +553,52 @@ class TrendAnalyzer:
         
         return visual_adaptations
 
-    async def _apply_content_trends(
-        self,
-        content_analysis: Dict[str, Any],
-        trends_analysis: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Применение контентных трендов."""
-        
-        content_modifications = {
-            "narrative_structure": {},
-            "engagement_elements": [],
-            "hashtag_suggestions": [],
-            "call_to_action": ""
-        }
+    def _get_narrative_structure(self, content_themes: Dict[str, Any]) -> Dict[str, str]:
+        """Структура повествования по самой вирусной теме."""
         
         try:
             # Лучшие темы
             top_themes = sorted(
-                trends_analysis["content_themes"].items(),
+                content_themes.items(),
                 key=lambda x: x[1]["viral_potential"],
                 reverse=True
             )[:2]
             
-            # Структура повествования
             if top_themes:
                 primary_theme = top_themes[0][0]
                 
                 if primary_theme == "transformation":
-                    content_modifications["narrative_structure"] = {
+                    return {
                         "opening": "Покажите исходное состояние",
                         "middle": "Процесс изменения",
                         "ending": "Результат с вау-эффектом"
                     }
                 elif primary_theme == "tutorials":
-                    content_modifications["narrative_structure"] = {
+                    return {
                         "opening": "Проблема или вопрос",
                         "middle": "Пошаговое решение",
                         "ending": "Финальный результат"
                     }
             
+        except Exception as e:
+            logger.warning(f"Ошибка выбора структуры повествования: {e}")
+        
+        return {}
+
+    async def _apply_content_trends(
+        self,
+        trend_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Применение контентных трендов."""
+        
+        content_modifications = {
+            "narrative_structure": dict(trend_context["narrative_structure"]),
+            "engagement_elements": [],
+            "hashtag_suggestions": [],
+            "call_to_action": ""
+        }
+        
+        try:
             # Элементы вовлечения
             content_modifications["engagement_elements"] = random.sample(
                 self.current_trends["engagement_triggers"], 2
@@ -629,9 +699,14 @@ class TrendAnalyzer:
     def export_trends_report(
         self, 
         trends_analysis: Dict[str, Any], 
-        output_path: Path
-    ) -> None:
-        """Экспорт отчёта по трендам."""
+        output_path: Path,
+        compress: bool = True
+    ) -> Optional[Path]:
+        """Экспорт отчёта по трендам.
+        
+        При compress=True отчёт пишется в gzip (к имени добавляется ``.gz``).
+        Возвращает путь к сохранённому файлу.
+        """
         
         try:
             report = {
@@ -646,13 +721,27 @@ class TrendAnalyzer:
                 }
             }
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            if ORJSON_AVAILABLE:
+                payload = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+            else:
+                payload = json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8")
+            
+            output_path = Path(output_path)
+            if compress:
+                if output_path.suffix != ".gz":
+                    output_path = output_path.with_name(f"{output_path.name}.gz")
+                # Отчёт хорошо сжимается, поэтому уровня 1 достаточно
+                with gzip.open(output_path, "wb", compresslevel=1) as f:
+                    f.write(payload)
+            else:
+                output_path.write_bytes(payload)
                 
             self.logger.info(f"Отчёт по трендам сохранён: {output_path}")
+            return output_path
             
         except Exception as e:
             logger.error(f"Ошибка сохранения отчёта: {e}")
+            return None
 
     def _get_top_trend(self, trends_analysis: Dict[str, Any], trend_type: str) -> str:
         """Получение топового тренда по типу."""
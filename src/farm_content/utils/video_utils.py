@@ -4,14 +4,53 @@
 
 import asyncio
 import json
-import random
+import os
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from fractions import Fraction
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+import cv2
+import ffmpeg
 import numpy as np
 from moviepy.video.io.VideoFileClip import VideoFileClip
 
+# PySceneDetect опционален: без него смена сцен ищется по выборке кадров ffmpeg
+try:
+    from scenedetect import SceneManager, open_video
+    from scenedetect.detectors import HistogramDetector
+    SCENEDETECT_AVAILABLE = True
+except ImportError:
+    SCENEDETECT_AVAILABLE = False
+
+# PyAV опционален: декодирование в процессе с внутренним пулом потоков libavcodec
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+try:
+    import numpy_rms
+    NUMPY_RMS_AVAILABLE = True
+except ImportError:
+    NUMPY_RMS_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from farm_content.core import VideoProcessingError, VideoQuality, get_logger
 from .advanced_analyzer import AdvancedVideoAnalyzer
 from .viral_generator import ViralContentGenerator
@@ -22,25 +61,389 @@ from .trend_analyzer import TrendAnalyzer
 
 logger = get_logger(__name__)
 
+# Выборка кадров для поиска смены сцен
+SCENE_SAMPLE_INTERVAL = 5  # секунд между кадрами
+SCENE_FRAME_SIZE = (160, 90)  # кадры уменьшаются и переводятся в оттенки серого
+
+# Частота дискретизации для анализа громкости (для RMS по секундам достаточно)
+AUDIO_ANALYSIS_FPS = 22050
+AUDIO_BLOCK_SECONDS = 60  # аудио читается блоками, а не целиком
+
+# Пик громкости, при котором звук считается уже нормализованным
+NORMALIZED_PEAK_RANGE = (0.3, 0.95)
+
+# Пул для параллельного кодирования финальных видео. Клипы MoviePy не
+# сериализуются, поэтому потоки, а не процессы: x264 работает в подпроцессе ffmpeg
+ENCODE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+_encode_executor = ThreadPoolExecutor(
+    max_workers=ENCODE_WORKERS, thread_name_prefix="farm-content-encode"
+)
+
+# Платформы с высоким ожидаемым охватом в стратегии публикации
+HIGH_PERFORMANCE_PLATFORMS = frozenset({"tiktok", "instagram_reels"})
+
+# Кэш посекундной энергии аудио (одно число на секунду дорожки)
+ENERGY_CACHE_SIZE = 16
+_energy_cache: "OrderedDict[Tuple[str, int, int], List[float]]" = OrderedDict()
+
+# Аппаратные H.264 кодировщики в порядке предпочтения; libx264 - запасной
+HW_H264_ENCODERS = ("h264_nvenc", "h264_videotoolbox", "h264_qsv")
+H264_ENCODER_ARGS = {"h264_nvenc": {"preset": "p4", "rc": "vbr", "cq": 23}}
+_h264_encoder: Optional[str] = None
+
+# Кэш метаданных ffprobe
+PROBE_CACHE_SIZE = 64
+_probe_cache: "OrderedDict[Tuple[str, int, int], Dict[str, Any]]" = OrderedDict()
+
+
+def _sample_gray_frames(video_path: str, interval: int) -> np.ndarray:
+    """Выборка кадров раз в ``interval`` секунд одним вызовом ffmpeg."""
+    if AV_AVAILABLE:
+        try:
+            return _sample_gray_frames_av(video_path, interval)
+        except Exception as e:
+            logger.warning(f"PyAV decode failed, falling back to ffmpeg: {e}")
+
+    width, height = SCENE_FRAME_SIZE
+    out, _ = (
+        ffmpeg
+        .input(video_path)
+        .filter("fps", fps=f"1/{interval}")
+        # Усреднение по блокам (area), а не выборка пикселей: шум и мелкие
+        # детали не влияют на разность кадров
+        .filter("scale", width, height, flags="area")
+        .output("pipe:", format="rawvideo", pix_fmt="gray")
+        .global_args("-hide_banner", "-loglevel", "error")
+        .run(capture_stdout=True)
+    )
+
+    frame_bytes = width * height
+    count = len(out) // frame_bytes
+    return np.frombuffer(out, np.uint8, count * frame_bytes).reshape(
+        count, height, width
+    )
+
+
+def _sample_gray_frames_av(video_path: str, interval: int) -> np.ndarray:
+    """Выборка кадров через PyAV с многопоточным декодированием.
+
+    Декодер работает в пуле потоков libavcodec без GIL; в numpy
+    переводятся только выбранные кадры, уже уменьшенные и в оттенках серого.
+    """
+    width, height = SCENE_FRAME_SIZE
+    frames = []
+    next_time = 0.0
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+
+        for frame in container.decode(stream):
+            if frame.time is None or frame.time < next_time:
+                continue
+            frames.append(
+                frame.to_ndarray(
+                    format="gray", width=width, height=height, interpolation="AREA"
+                )
+            )
+            while next_time <= frame.time:
+                next_time += interval
+
+    if not frames:
+        return np.empty((0, height, width), dtype=np.uint8)
+    return np.stack(frames)
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _consecutive_frame_diffs(frames: np.ndarray) -> np.ndarray:
+        """Средняя абсолютная разность соседних uint8-кадров (Numba)."""
+        count = frames.shape[0] - 1
+        height, width = frames.shape[1], frames.shape[2]
+        diffs = np.empty(count)
+        for k in prange(count):
+            total = 0
+            for i in range(height):
+                for j in range(width):
+                    total += abs(np.int32(frames[k + 1, i, j]) - np.int32(frames[k, i, j]))
+            diffs[k] = total / (height * width)
+        return diffs
+
+else:
+
+    def _consecutive_frame_diffs(frames: np.ndarray) -> np.ndarray:
+        """Средняя абсолютная разность соседних uint8-кадров.
+
+        cv2.norm(NORM_L1) считает сумму модулей разностей прямо по uint8
+        (SIMD-инструкции SAD), без промежуточных массивов int16.
+        """
+        pixels = frames.shape[1] * frames.shape[2]
+        return np.array([
+            cv2.norm(current, previous, cv2.NORM_L1)
+            for previous, current in zip(frames[:-1], frames[1:])
+        ]) / pixels
+
+
+def _write_enhanced_video(clip: VideoFileClip, output_path: Path) -> None:
+    """Кодирование видео с текстовыми элементами (выполняется в пуле).
+
+    Аппаратный кодировщик, если он есть; при ошибке - повтор через libx264.
+    """
+    encoder = _select_h264_encoder()
+    encoder_args = dict(H264_ENCODER_ARGS.get(encoder, {}))
+    # MoviePy передает -preset всегда, остальные параметры - через ffmpeg_params
+    preset = encoder_args.pop("preset", "medium")
+    ffmpeg_params = [
+        item for key, value in encoder_args.items() for item in (f"-{key}", str(value))
+    ]
+
+    try:
+        clip.write_videofile(
+            str(output_path),
+            codec=encoder,
+            preset=preset,
+            ffmpeg_params=ffmpeg_params or None,
+            audio_codec="aac",
+            verbose=False,
+            logger=None,
+        )
+    except (IOError, OSError) as e:
+        if encoder == "libx264":
+            raise
+        logger.warning(f"{encoder} failed ({e}), re-encoding with libx264")
+        clip.write_videofile(
+            str(output_path),
+            codec="libx264",
+            audio_codec="aac",
+            verbose=False,
+            logger=None,
+        )
+
+
+def _select_h264_encoder() -> str:
+    """Выбор H.264 кодировщика: первый рабочий аппаратный, иначе libx264.
+
+    Наличие кодировщика в сборке ffmpeg не гарантирует наличия устройства,
+    поэтому кандидаты проверяются пробным кодированием (один раз за процесс).
+    """
+    global _h264_encoder
+    if _h264_encoder is not None:
+        return _h264_encoder
+
+    encoder = "libx264"
+    for candidate in HW_H264_ENCODERS:
+        try:
+            (
+                ffmpeg
+                .input("color=size=256x256:duration=0.1", f="lavfi")
+                .output("-", f="null", vcodec=candidate)
+                .global_args("-hide_banner", "-loglevel", "error")
+                .run(capture_stdout=True, capture_stderr=True)
+            )
+        except ffmpeg.Error:
+            continue
+        encoder = candidate
+        break
+
+    logger.info(f"H.264 кодировщик: {encoder}")
+    _h264_encoder = encoder
+    return encoder
+
+
+def _dump_report(data: Dict[str, Any], indent: bool = True) -> bytes:
+    """Сериализация отчета в JSON (orjson, если установлен).
+
+    ``indent=False`` дает компактный JSON для больших машинных отчетов.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+
+    if indent:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _probe_video(video_path: Path) -> Dict[str, Any]:
+    """Метаданные видео через ffprobe, без декодирования кадров.
+
+    Результат кэшируется по (путь, mtime, размер): один и тот же файл
+    пробуется и при анализе, и при рендере каждого клипа.
+    """
+    stat = video_path.stat()
+    key = (str(video_path), stat.st_mtime_ns, stat.st_size)
+
+    info = _probe_cache.get(key)
+    if info is None:
+        info = _run_probe(video_path)
+        _probe_cache[key] = info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    else:
+        _probe_cache.move_to_end(key)
+
+    return dict(info)
+
+
+def _run_probe(video_path: Path) -> Dict[str, Any]:
+    """Вызов ffprobe и разбор потоков."""
+    probe = ffmpeg.probe(str(video_path))
+    streams = probe["streams"]
+    video_stream = next(s for s in streams if s["codec_type"] == "video")
+
+    # Частота кадров приходит дробью вида "30000/1001"
+    rate = video_stream.get("avg_frame_rate", "0/0")
+    if rate.endswith("/0"):
+        rate = video_stream.get("r_frame_rate", "0/1")
+    fps = float(Fraction(rate)) if not rate.endswith("/0") else 0.0
+
+    duration = probe.get("format", {}).get("duration") or video_stream.get("duration", 0)
+
+    return {
+        "width": int(video_stream["width"]),
+        "height": int(video_stream["height"]),
+        "duration": float(duration),
+        "fps": fps,
+        "has_audio": any(s["codec_type"] == "audio" for s in streams),
+    }
+
+
+def _iter_audio_blocks(video_path: str, fps: int, block_seconds: int) -> Iterator[np.ndarray]:
+    """Потоковое чтение дорожки блоками по ``block_seconds`` секунд.
+
+    ffmpeg сразу отдаёт 16-bit моно PCM нужной частоты; блоки возвращаются
+    как float32 в диапазоне [-1, 1].
+    """
+    process = (
+        ffmpeg
+        .input(video_path)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=fps)
+        .global_args("-hide_banner", "-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    block_bytes = fps * block_seconds * 2
+
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            samples = np.frombuffer(data, np.int16, len(data) // 2)
+            yield samples.astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def _windowed_rms(samples: np.ndarray, window: int) -> List[float]:
+    """RMS по последовательным окнам; последнее окно может быть неполным."""
+    full_windows = len(samples) // window
+    body = samples[: full_windows * window]
+
+    if NUMPY_RMS_AVAILABLE and full_windows:
+        levels = numpy_rms.rms(body, window_size=window).tolist()
+    else:
+        chunks = body.reshape(full_windows, window)
+        levels = np.sqrt(np.einsum("ij,ij->i", chunks, chunks) / window).tolist()
+
+    tail = samples[full_windows * window :]
+    if len(tail) > 0:
+        levels.append(float(np.sqrt(np.mean(tail**2))))
+
+    return levels
+
+
+def _audio_energy_levels(video_path: str) -> List[float]:
+    """RMS энергия дорожки по секундам.
+
+    Дорожка читается блоками, кратными секунде, поэтому неполным может быть
+    только последнее окно. Результат кэшируется по (путь, mtime, размер):
+    повторный анализ того же файла не декодирует аудио заново.
+    """
+    stat = os.stat(video_path)
+    key = (video_path, stat.st_mtime_ns, stat.st_size)
+
+    energy_levels = _energy_cache.get(key)
+    if energy_levels is None:
+        energy_levels = []
+        for block in _iter_audio_blocks(video_path, AUDIO_ANALYSIS_FPS, AUDIO_BLOCK_SECONDS):
+            energy_levels.extend(_windowed_rms(block, AUDIO_ANALYSIS_FPS))
+        _energy_cache[key] = energy_levels
+        while len(_energy_cache) > ENERGY_CACHE_SIZE:
+            _energy_cache.popitem(last=False)
+    else:
+        _energy_cache.move_to_end(key)
+
+    return list(energy_levels)
+
+
+def _detect_histogram_cuts(video_path: str, limit: int) -> List[float]:
+    """Поиск склеек через PySceneDetect HistogramDetector.
+
+    Возвращает не более ``limit`` моментов склеек, равномерно по всему видео.
+    """
+    scene_manager = SceneManager()
+    scene_manager.add_detector(HistogramDetector())
+    scene_manager.detect_scenes(open_video(video_path), show_progress=False)
+
+    # Первая сцена начинается с нуля - это не склейка
+    cuts = [start.get_seconds() for start, _ in scene_manager.get_scene_list()[1:]]
+    if len(cuts) <= limit:
+        return cuts
+
+    picks = np.unique(np.linspace(0, len(cuts) - 1, limit).round().astype(int))
+    return [cuts[i] for i in picks]
+
+
+def _overlaps_sorted(starts: List[float], start: float, length: float) -> bool:
+    """Проверка пересечения клипа с уже выбранными.
+
+    ``starts`` - отсортированные начала непересекающихся клипов одинаковой
+    длины ``length``, поэтому достаточно проверить двух соседей.
+    """
+    idx = bisect_left(starts, start)
+    if idx > 0 and starts[idx - 1] + length > start:
+        return True
+    return idx < len(starts) and starts[idx] < start + length
+
 
 class VideoAnalyzer:
     """Анализатор видео для определения лучших моментов."""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.logger = get_logger(f"{__name__}.VideoAnalyzer")
 
+        # Собственный генератор для случайного выбора: seed дает
+        # воспроизводимую нарезку
+        self._rng = np.random.default_rng(seed)
+
     async def analyze_video(self, video_path: Path) -> Dict[str, Any]:
         """Анализ видео для получения метаданных."""
         try:
-            with VideoFileClip(str(video_path)) as video:
-                return {
-                    "duration": video.duration,
-                    "fps": video.fps,
-                    "size": video.size,
-                    "aspect_ratio": video.w / video.h if video.h > 0 else 1,
-                    "has_audio": video.audio is not None,
-                    "file_size": video_path.stat().st_size,
-                }
+            try:
+                # ffprobe читает только заголовки контейнера, без запуска декодера
+                info = _probe_video(video_path)
+                duration, fps = info["duration"], info["fps"]
+                width, height = info["width"], info["height"]
+                has_audio = info["has_audio"]
+            except Exception as e:
+                logger.debug(f"ffprobe failed, opening clip: {e}")
+                with VideoFileClip(str(video_path)) as video:
+                    duration, fps = video.duration, video.fps
+                    width, height = video.size
+                    has_audio = video.audio is not None
+
+            return {
+                "duration": duration,
+                "fps": fps,
+                "size": [width, height],
+                "aspect_ratio": width / height if height > 0 else 1,
+                "has_audio": has_audio,
+                "file_size": video_path.stat().st_size,
+            }
 
         except Exception as e:
             logger.error(f"Ошибка анализа видео {video_path}: {e}")
@@ -54,30 +457,34 @@ class VideoAnalyzer:
         method: str = "smart",
     ) -> List[Tuple[float, float]]:
         """Поиск лучших моментов для нарезки."""
+        # Всем методам (и fallback) хватает метаданных из закэшированного
+        # ffprobe; умный анализ сам декодирует файл по пути
         try:
-            with VideoFileClip(str(video_path)) as video:
-                duration = video.duration
+            info = _probe_video(video_path)
+            duration = info["duration"]
+        except Exception as e:
+            logger.error(f"Ошибка открытия видео {video_path}: {e}")
+            raise VideoProcessingError(f"Не удалось открыть видео: {e}")
 
-                if method == "uniform":
-                    return self._uniform_distribution(
-                        duration, clips_count, clip_duration
-                    )
-                elif method == "smart":
-                    return await self._smart_analysis(video, clips_count, clip_duration)
-                elif method == "random":
-                    return self._random_selection(duration, clips_count, clip_duration)
-                else:
-                    return self._uniform_distribution(
-                        duration, clips_count, clip_duration
-                    )
+        try:
+            if method == "smart":
+                moments = await self._smart_analysis(
+                    str(video_path), duration, info["has_audio"],
+                    clips_count, clip_duration,
+                )
+            elif method == "random":
+                moments = self._random_selection(duration, clips_count, clip_duration)
+            else:
+                moments = self._uniform_distribution(
+                    duration, clips_count, clip_duration
+                )
+
+            return moments
 
         except Exception as e:
             logger.error(f"Ошибка поиска лучших моментов: {e}")
             # Fallback к равномерному распределению
-            with VideoFileClip(str(video_path)) as video:
-                return self._uniform_distribution(
-                    video.duration, clips_count, clip_duration
-                )
+            return self._uniform_distribution(duration, clips_count, clip_duration)
 
     def _uniform_distribution(
         self, duration: float, clips_count: int, clip_duration: int
@@ -95,96 +502,94 @@ class VideoAnalyzer:
             return [(start_offset, start_offset + clip_duration)]
 
         step = usable_duration / clips_count
-        clips = []
-
-        for i in range(clips_count):
-            start = start_offset + (i * step)
-            end = min(start + clip_duration, duration)
+        starts = start_offset + np.arange(clips_count) * step
+        ends = np.minimum(starts + clip_duration, duration)
 
-            # Проверяем, что клип достаточно длинный
-            if end - start >= clip_duration * 0.8:  # Минимум 80% от желаемой длины
-                clips.append((start, end))
+        # Проверяем, что клип достаточно длинный (минимум 80% от желаемой длины)
+        mask = ends - starts >= clip_duration * 0.8
 
-        return clips
+        return list(zip(starts[mask].tolist(), ends[mask].tolist()))
 
     async def _smart_analysis(
-        self, video: VideoFileClip, clips_count: int, clip_duration: int
+        self,
+        video_path: str,
+        duration: float,
+        has_audio: bool,
+        clips_count: int,
+        clip_duration: int,
     ) -> List[Tuple[float, float]]:
         """Умный анализ для поиска интересных моментов."""
         try:
-            # Анализируем аудио для поиска активных моментов
-            audio_peaks = await self._analyze_audio_activity(video)
-
-            # Анализируем видео на предмет изменений сцен
-            scene_changes = await self._detect_scene_changes(video)
+            # Аудио (активные моменты) и видео (смена сцен) декодируются
+            # одновременно: каждый проход последовательный, без перемоток
+            audio_peaks, scene_changes = await asyncio.gather(
+                self._analyze_audio_activity(video_path, has_audio),
+                self._detect_scene_changes(video_path),
+            )
 
             # Комбинируем данные для выбора лучших моментов
-            candidates = self._combine_analysis_data(
-                audio_peaks, scene_changes, video.duration
+            times, weights = self._combine_analysis_data(
+                audio_peaks, scene_changes, duration
             )
 
             # Выбираем лучшие моменты
-            return self._select_best_clips(candidates, clips_count, clip_duration)
+            return self._select_best_clips(times, weights, clips_count, clip_duration)
 
         except Exception as e:
             logger.warning(f"Smart analysis failed, falling back to uniform: {e}")
-            return self._uniform_distribution(
-                video.duration, clips_count, clip_duration
-            )
+            return self._uniform_distribution(duration, clips_count, clip_duration)
 
-    async def _analyze_audio_activity(self, video: VideoFileClip) -> List[float]:
+    async def _analyze_audio_activity(self, video_path: str, has_audio: bool) -> List[float]:
         """Анализ активности аудио."""
-        if not video.audio:
+        if not has_audio:
             return []
 
         try:
-            # Получаем аудио массив
-            audio_array = video.audio.to_soundarray()
-
-            # Вычисляем RMS энергию для каждой секунды
-            chunk_size = int(video.audio.fps)  # 1 секунда
-
-            energy_levels = []
-            for i in range(0, len(audio_array), chunk_size):
-                chunk = audio_array[i : i + chunk_size]
-                if len(chunk) > 0:
-                    # RMS энергия
-                    rms = np.sqrt(np.mean(chunk**2))
-                    energy_levels.append(rms)
-
-            return energy_levels
+            # Декодирование в пуле, чтобы идти параллельно с поиском сцен
+            return await asyncio.get_running_loop().run_in_executor(
+                None, _audio_energy_levels, video_path
+            )
 
         except Exception as e:
             logger.warning(f"Audio analysis failed: {e}")
             return []
 
-    async def _detect_scene_changes(self, video: VideoFileClip) -> List[float]:
+    async def _detect_scene_changes(self, video_path: str) -> List[float]:
         """Обнаружение смены сцен."""
-        try:
-            # Анализируем каждую секунду
-            scene_changes = []
-            prev_frame = None
+        loop = asyncio.get_running_loop()
 
-            for t in range(0, int(video.duration), 5):  # Каждые 5 секунд
+        try:
+            if SCENEDETECT_AVAILABLE:
                 try:
-                    frame = video.get_frame(t)
+                    return await loop.run_in_executor(
+                        None, _detect_histogram_cuts, video_path, 20
+                    )
+                except Exception as e:
+                    logger.warning(f"PySceneDetect failed, sampling frames: {e}")
 
-                    if prev_frame is not None:
-                        # Вычисляем разность между кадрами
-                        diff = np.mean(
-                            np.abs(frame.astype(float) - prev_frame.astype(float))
-                        )
-                        scene_changes.append((t, diff))
+            # Все кадры (каждые 5 секунд) декодируются за один проход ffmpeg
+            frames = await loop.run_in_executor(
+                None, _sample_gray_frames, video_path, SCENE_SAMPLE_INTERVAL
+            )
+            if len(frames) < 2:
+                return []
 
-                    prev_frame = frame
+            # Разность между соседними кадрами
+            diffs = _consecutive_frame_diffs(frames)
+            times = np.arange(1, len(frames)) * SCENE_SAMPLE_INTERVAL
 
-                except Exception:
-                    continue
+            # Одинаковые кадры (статика, заставки) - не смена сцены
+            changed = diffs > 0
+            diffs, times = diffs[changed], times[changed]
+            if len(diffs) == 0:
+                return []
 
-            # Сортируем по величине изменения
-            scene_changes.sort(key=lambda x: x[1], reverse=True)
+            # Топ 20 изменений: выбор за O(n), сортируется только сам топ
+            top_count = min(20, len(diffs))
+            top = np.argpartition(-diffs, top_count - 1)[:top_count]
+            top = top[np.argsort(-diffs[top], kind="stable")]
 
-            return [t for t, _ in scene_changes[:20]]  # Топ 20 изменений
+            return times[top].tolist()
 
         except Exception as e:
             logger.warning(f"Scene change detection failed: {e}")
@@ -192,100 +597,122 @@ class VideoAnalyzer:
 
     def _combine_analysis_data(
         self, audio_peaks: List[float], scene_changes: List[float], duration: float
-    ) -> List[Tuple[float, float]]:
-        """Комбинирование данных анализа."""
-        candidates = []
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Комбинирование данных анализа.
+
+        Возвращает массивы времён кандидатов и их весов.
+        """
+        times = []
+        weights = []
 
         # Добавляем кандидатов на основе аудио пиков
         if audio_peaks:
-            avg_energy = np.mean(audio_peaks)
-            for i, energy in enumerate(audio_peaks):
-                if energy > avg_energy * 1.2:  # 20% выше среднего
-                    candidates.append((i, energy * 0.7))  # Вес 0.7
+            energy = np.asarray(audio_peaks, dtype=float)
+            peaks = np.flatnonzero(energy > energy.mean() * 1.2)  # 20% выше среднего
+            times.append(peaks.astype(float))
+            weights.append(energy[peaks] * 0.7)  # Вес 0.7
 
         # Добавляем кандидатов на основе смены сцен
-        for t in scene_changes:
-            candidates.append((t, 0.8))  # Вес 0.8
+        scenes = np.asarray(scene_changes, dtype=float)
+        times.append(scenes)
+        weights.append(np.full(len(scenes), 0.8))  # Вес 0.8
 
         # Добавляем равномерно распределенные точки как fallback
-        for i in range(int(duration * 0.1), int(duration * 0.9), 30):
-            candidates.append((i, 0.3))  # Низкий вес
+        uniform = np.arange(int(duration * 0.1), int(duration * 0.9), 30, dtype=float)
+        times.append(uniform)
+        weights.append(np.full(len(uniform), 0.3))  # Низкий вес
 
-        return candidates
+        return np.concatenate(times), np.concatenate(weights)
 
     def _select_best_clips(
         self,
-        candidates: List[Tuple[float, float]],
+        times: np.ndarray,
+        weights: np.ndarray,
         clips_count: int,
         clip_duration: int,
     ) -> List[Tuple[float, float]]:
         """Выбор лучших клипов из кандидатов."""
-        # Сортируем по весу
-        candidates.sort(key=lambda x: x[1], reverse=True)
+        times = np.asarray(times, dtype=float)
+        weights = np.asarray(weights, dtype=float)
 
-        selected_clips = []
-        used_intervals = []
+        # Сначала рассматриваем только верхушку кандидатов (с запасом на
+        # пересечения), остальные - если клипов не хватило
+        top_count = min(len(weights), clips_count * 4)
+        if top_count == 0:
+            return []
+        threshold = np.partition(weights, len(weights) - top_count)[-top_count]
+        top = np.flatnonzero(weights >= threshold)
+        rest = np.flatnonzero(weights < threshold)
 
-        for start_time, weight in candidates:
-            if len(selected_clips) >= clips_count:
-                break
+        selected_clips = []
+        used_starts: List[float] = []
 
-            end_time = start_time + clip_duration
+        for indices in (top, rest):
+            # Сортируем по весу (при равенстве - в исходном порядке)
+            for i in indices[np.lexsort((indices, -weights[indices]))]:
+                if len(selected_clips) >= clips_count:
+                    return selected_clips
 
-            # Проверяем пересечение с уже выбранными клипами
-            overlaps = False
-            for used_start, used_end in used_intervals:
-                if not (end_time <= used_start or start_time >= used_end):
-                    overlaps = True
-                    break
+                start_time = float(times[i])
 
-            if not overlaps:
-                selected_clips.append((start_time, end_time))
-                used_intervals.append((start_time, end_time))
+                # Проверяем пересечение с уже выбранными клипами
+                if not _overlaps_sorted(used_starts, start_time, clip_duration):
+                    selected_clips.append((start_time, start_time + clip_duration))
+                    insort(used_starts, start_time)
 
         return selected_clips
 
     def _random_selection(
         self, duration: float, clips_count: int, clip_duration: int
     ) -> List[Tuple[float, float]]:
-        """Случайный выбор моментов."""
-        import random
+        """Случайный выбор моментов.
 
+        Диапазон делится на равные интервалы, и в каждом клип ставится со
+        случайным сдвигом: клипы не пересекаются без повторных попыток.
+        """
         if duration < clip_duration:
             return [(0, duration)]
 
         # Исключаем первые и последние 10%
         start_offset = duration * 0.1
-        end_offset = duration * 0.9 - clip_duration
+        usable_duration = duration * 0.9 - start_offset
 
-        if end_offset <= start_offset:
+        if usable_duration <= clip_duration:
             return [(start_offset, start_offset + clip_duration)]
 
-        clips = []
-        attempts = 0
-        max_attempts = clips_count * 10
-
-        while len(clips) < clips_count and attempts < max_attempts:
-            start = random.uniform(start_offset, end_offset)
-            end = start + clip_duration
-
-            # Проверяем пересечение
-            overlaps = any(
-                not (end <= existing_start or start >= existing_end)
-                for existing_start, existing_end in clips
-            )
-
-            if not overlaps:
-                clips.append((start, end))
+        # Сколько клипов помещается без пересечений
+        count = min(clips_count, int(usable_duration // clip_duration))
+        if count <= 0:
+            return []
 
-            attempts += 1
+        bin_size = usable_duration / count
+        offsets = self._rng.uniform(0, bin_size - clip_duration, count)
+        starts = start_offset + np.arange(count) * bin_size + offsets
 
-        return clips
+        return list(zip(starts.tolist(), (starts + clip_duration).tolist()))
 
 
 class ViralClipExtractor:
     """Улучшенный экстрактор клипов с AI-анализом и вирусной оптимизацией."""
 
+    # Настройки качества (константы класса, общие для всех экземпляров)
+    quality_settings = {
+        VideoQuality.LOW: {"height": 480, "bitrate": "1000k"},
+        VideoQuality.MEDIUM: {"height": 720, "bitrate": "2500k"},
+        VideoQuality.HIGH: {"height": 1080, "bitrate": "5000k"},
+        VideoQuality.ULTRA: {"height": 2160, "bitrate": "15000k"},
+    }
+
+    # Настройки для вирусного контента
+    viral_settings = {
+        "min_energy_threshold": 0.6,
+        "optimal_clip_duration": 30,
+        "max_clips_per_video": 5,
+        "auto_enhance": True,
+        "generate_metadata": True,
+        "multiplatform_export": True
+    }
+
     def __init__(self):
         self.logger = get_logger(f"{__name__}.ViralClipExtractor")
         
@@ -297,24 +724,6 @@ class ViralClipExtractor:
         self.text_generator = TextElementsGenerator()
         self.trend_analyzer = TrendAnalyzer()
 
-        # Настройки качества
-        self.quality_settings = {
-            VideoQuality.LOW: {"height": 480, "bitrate": "1000k"},
-            VideoQuality.MEDIUM: {"height": 720, "bitrate": "2500k"},
-            VideoQuality.HIGH: {"height": 1080, "bitrate": "5000k"},
-            VideoQuality.ULTRA: {"height": 2160, "bitrate": "15000k"},
-        }
-        
-        # Настройки для вирусного контента
-        self.viral_settings = {
-            "min_energy_threshold": 0.6,
-            "optimal_clip_duration": 30,
-            "max_clips_per_video": 5,
-            "auto_enhance": True,
-            "generate_metadata": True,
-            "multiplatform_export": True
-        }
-
     async def create_viral_clips(
         self,
         video_path: Path,
@@ -386,11 +795,11 @@ class ViralClipExtractor:
                 }
             }
             
-            # Сохраняем метаданные в JSON
-            import json
+            # Сохраняем метаданные в JSON (запись в пуле, не блокируя цикл)
             metadata_file = output_dir / f"{video_path.stem}_viral_content.json"
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            await asyncio.get_running_loop().run_in_executor(
+                None, metadata_file.write_bytes, _dump_report(results)
+            )
             
             self.logger.info(f"✅ Вирусный контент создан! Метаданные: {metadata_file}")
             return results
@@ -410,9 +819,21 @@ class ViralClipExtractor:
         output_dir: Optional[Path] = None,
         apply_effects: bool = False,
         target_platform: str = "tiktok",
+        known_audio_peak: Optional[float] = None,
     ) -> Path:
-        """Извлечение клипа из видео с опциональными эффектами."""
+        """Извлечение клипа из видео с опциональными эффектами.
+
+        ``known_audio_peak`` - уже измеренный пик громкости фрагмента
+        (0..1); если он в нормальном диапазоне, нормализация пропускается.
+        """
         try:
+            if (
+                normalize_audio
+                and known_audio_peak is not None
+                and NORMALIZED_PEAK_RANGE[0] < known_audio_peak < NORMALIZED_PEAK_RANGE[1]
+            ):
+                normalize_audio = False
+
             if output_dir is None:
                 output_dir = video_path.parent / "clips"
                 output_dir.mkdir(exist_ok=True)
@@ -422,44 +843,39 @@ class ViralClipExtractor:
             platform_suffix = f"_{target_platform}" if apply_effects else ""
             output_file = output_dir / f"{video_path.stem}_clip_{timestamp}{platform_suffix}.mp4"
 
-            with VideoFileClip(str(video_path)) as video:
-                # Обрезаем по времени
-                clip = video.subclip(start_time, end_time)
-
-                # Применяем эффекты если нужно
-                if apply_effects:
-                    self.logger.info(f"🎨 Применение эффектов для {target_platform}...")
-                    enhanced_clip = await self.effects_engine.apply_viral_effects(
-                        video_path,
-                        style="tiktok_viral",
-                        intensity=0.8,
-                        auto_optimize=True,
-                        target_platform=target_platform
-                    )
-                    clip = enhanced_clip.subclip(start_time, end_time)
-
-                # Применяем базовую обработку
-                if mobile_format:
-                    clip = self._apply_mobile_format(clip)
-
-                clip = self._apply_quality_settings(clip, output_quality)
-
-                if normalize_audio and clip.audio:
-                    clip = clip.audio_normalize()
-
-                # Сохраняем
-                await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: clip.write_videofile(
-                        str(output_file),
-                        codec="libx264",
-                        audio_codec="aac",
-                        temp_audiofile="temp-audio.m4a",
-                        remove_temp=True,
-                        verbose=False,
-                        logger=None,
-                    ),
+            # С эффектами фрагмент сначала вырезается из исходника, а эффекты
+            # применяются только к нему: не рендерится все видео (обрезанное
+            # до лимита платформы), и у каждого клипа свои файлы
+            render_file = output_file
+            if apply_effects:
+                render_file = output_file.with_name(f"{output_file.stem}_cut.mp4")
+
+            # Обрезка, кадрирование, масштаб и нормализация звука - один проход ffmpeg
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                self._render_clip,
+                video_path,
+                start_time,
+                end_time,
+                render_file,
+                output_quality,
+                mobile_format,
+                normalize_audio,
+            )
+
+            if apply_effects:
+                self.logger.info(f"🎨 Применение эффектов для {target_platform}...")
+                enhanced = await self.effects_engine.apply_viral_effects(
+                    render_file,
+                    platform=target_platform,
+                    intensity=0.8,
+                    output_path=output_file,
                 )
+                if enhanced == output_file:
+                    render_file.unlink()
+                else:
+                    # Эффекты не применились - отдаем клип без них
+                    render_file.replace(output_file)
 
             logger.info(f"✅ Клип сохранен: {output_file}")
             return output_file
@@ -468,6 +884,148 @@ class ViralClipExtractor:
             logger.error(f"❌ Ошибка извлечения клипа: {e}")
             raise VideoProcessingError(f"Не удалось извлечь клип: {e}")
 
+    async def extract_clips(
+        self,
+        video_path: Path,
+        segments: List[Tuple[float, float]],
+        output_dir: Optional[Path] = None,
+    ) -> List[Path]:
+        """Нарезка нескольких фрагментов без перекодирования за один запуск ffmpeg.
+
+        Один процесс ffmpeg, у каждого фрагмента свой вход с -ss/-to и свой
+        выход (копирование потоков). Для кадрирования, масштаба и
+        нормализации звука используйте extract_clip.
+        """
+        try:
+            if output_dir is None:
+                output_dir = video_path.parent / "clips"
+                output_dir.mkdir(exist_ok=True)
+
+            output_files = [
+                output_dir / f"{video_path.stem}_clip_{int(start)}-{int(end)}.mp4"
+                for start, end in segments
+            ]
+            if not output_files:
+                return []
+
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._copy_segments, video_path, segments, output_files
+            )
+
+            logger.info(f"✅ Нарезано клипов: {len(output_files)}")
+            return output_files
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка нарезки клипов: {e}")
+            raise VideoProcessingError(f"Не удалось нарезать клипы: {e}")
+
+    @staticmethod
+    def _copy_segments(
+        video_path: Path,
+        segments: List[Tuple[float, float]],
+        output_files: List[Path],
+    ) -> None:
+        """Один процесс ffmpeg: по входу и выходу на каждый фрагмент.
+
+        -ss/-to стоят на входе, как в _render_clip: при копировании потоков
+        -ss на выходе отбрасывает видео до следующего ключевого кадра.
+        Кадры от предыдущего ключевого до start получают отрицательные метки
+        и скрываются edit list'ом MP4 - клип начинается ровно с start.
+        """
+        outputs = [
+            ffmpeg.input(str(video_path), ss=start, to=end).output(
+                str(output_file),
+                c="copy",
+                movflags="+faststart",
+            )
+            for (start, end), output_file in zip(segments, output_files)
+        ]
+        (
+            ffmpeg.merge_outputs(*outputs)
+            .global_args("-hide_banner", "-loglevel", "error")
+            .run(overwrite_output=True)
+        )
+
+    def _render_clip(
+        self,
+        video_path: Path,
+        start_time: float,
+        end_time: float,
+        output_file: Path,
+        output_quality: VideoQuality,
+        mobile_format: bool,
+        normalize_audio: bool,
+    ) -> None:
+        """Рендер клипа единым графом фильтров ffmpeg (одно декодирование)."""
+        info = _probe_video(video_path)
+        width, height = info["width"], info["height"]
+
+        source = ffmpeg.input(str(video_path), ss=start_time, to=end_time)
+
+        # Мобильный формат (9:16): центральный кроп горизонтального видео
+        target_w = int(height * 9 / 16) // 2 * 2  # libx264 требует чётную ширину
+        needs_crop = mobile_format and width >= height and target_w <= width
+
+        settings = self.quality_settings.get(output_quality)
+        needs_scale = bool(settings) and height > settings["height"]
+
+        # Фильтры не нужны - копируем потоки без перекодирования
+        # (-ss перед -i: быстрый поиск по ключевым кадрам; кадры от
+        # предыдущего ключевого до start скрываются edit list'ом MP4)
+        if not (needs_crop or needs_scale or (normalize_audio and info["has_audio"])):
+            (
+                source
+                .output(
+                    str(output_file),
+                    c="copy",
+                    movflags="+faststart",
+                )
+                .global_args("-hide_banner", "-loglevel", "error")
+                .run(overwrite_output=True)
+            )
+            return
+
+        video = source.video
+        if needs_crop:
+            x1 = width // 2 - target_w // 2
+            video = video.filter("crop", target_w, height, x1, 0)
+
+        # Настройки качества
+        encoder = _select_h264_encoder()
+        output_args: Dict[str, Any] = {"vcodec": encoder, **H264_ENCODER_ARGS.get(encoder, {})}
+        if settings:
+            output_args["video_bitrate"] = settings["bitrate"]
+            if needs_scale:
+                video = video.filter("scale", -2, settings["height"])
+
+        streams = [video]
+        if info["has_audio"]:
+            audio = source.audio
+            if normalize_audio:
+                audio = audio.filter("loudnorm", I=-14, TP=-1.5, LRA=11)
+            streams.append(audio)
+            output_args.update(acodec="aac", ar=44100)
+
+        def run(args: Dict[str, Any]) -> None:
+            (
+                ffmpeg
+                .output(*streams, str(output_file), **args)
+                .global_args("-hide_banner", "-loglevel", "error")
+                .run(overwrite_output=True)
+            )
+
+        try:
+            run(output_args)
+        except ffmpeg.Error:
+            if encoder == "libx264":
+                raise
+            # Аппаратный кодировщик может не принять конкретный клип
+            # (разрешение, формат пикселей) - повторяем на CPU
+            logger.warning(f"{encoder} failed, re-encoding with libx264")
+            for key in H264_ENCODER_ARGS.get(encoder, {}):
+                output_args.pop(key)
+            run({**output_args, "vcodec": "libx264"})
+
     async def analyze_and_extract_best_clips(
         self,
         video_path: Path,
@@ -515,23 +1073,41 @@ class ViralClipExtractor:
                 )[:remaining]
                 best_clips.extend(additional_clips)
             
-            # Извлекаем клипы
+            # Клипы кодируются параллельно; семафор ограничивает число
+            # одновременных процессов ffmpeg
+            semaphore = asyncio.Semaphore(ENCODE_WORKERS)
+
+            async def extract(
+                i: int, start: float, end: float, audio_peak: Optional[float]
+            ) -> Path:
+                async with semaphore:
+                    self.logger.info(f"🎬 Создание клипа {i+1}/{len(best_clips)}: {start:.1f}s - {end:.1f}s")
+                    return await self.extract_clip(
+                        video_path=video_path,
+                        start_time=start,
+                        end_time=end,
+                        output_dir=output_dir,
+                        apply_effects=True,
+                        target_platform="tiktok",
+                        known_audio_peak=audio_peak,
+                    )
+
+            # Клипы запускаются в порядке времени, чтобы чтение шло по файлу
+            # вперед; результаты остаются в порядке ранга
+            order = sorted(range(len(best_clips)), key=lambda i: best_clips[i][0])
+            clip_paths = dict(zip(order, await asyncio.gather(*(
+                extract(
+                    i, best_clips[i][0], best_clips[i][1],
+                    best_clips[i][2].get("audio_peak"),
+                )
+                for i in order
+            ))))
+
             results = []
             for i, (start, end, clip_info) in enumerate(best_clips):
-                self.logger.info(f"🎬 Создание клипа {i+1}/{len(best_clips)}: {start:.1f}s - {end:.1f}s")
-                
-                clip_path = await self.extract_clip(
-                    video_path=video_path,
-                    start_time=start,
-                    end_time=end,
-                    output_dir=output_dir,
-                    apply_effects=True,
-                    target_platform="tiktok"
-                )
-                
                 clip_result = {
                     "clip_index": i + 1,
-                    "file_path": str(clip_path),
+                    "file_path": str(clip_paths[i]),
                     "start_time": start,
                     "end_time": end,
                     "duration": end - start,
@@ -550,34 +1126,6 @@ class ViralClipExtractor:
             logger.error(f"❌ Ошибка анализа и извлечения клипов: {e}")
             raise VideoProcessingError(f"Не удалось проанализировать и извлечь клипы: {e}")
 
-    def _apply_mobile_format(self, clip: VideoFileClip) -> VideoFileClip:
-        """Применение мобильного формата (9:16)."""
-        try:
-            w, h = clip.size
-
-            # Если уже вертикальное - оставляем как есть
-            if h > w:
-                return clip
-
-            # Делаем вертикальным (crop по центру)
-            target_w = int(h * 9 / 16)
-
-            if target_w <= w:
-                # Обрезаем по ширине
-                x_center = w // 2
-                x1 = x_center - target_w // 2
-                x2 = x1 + target_w
-                clip = clip.crop(x1=x1, x2=x2)
-            else:
-                # Добавляем черные полосы или изменяем размер
-                clip = clip.resize(height=h)
-
-            return clip
-
-        except Exception as e:
-            logger.warning(f"Ошибка применения мобильного формата: {e}")
-            return clip
-
     async def create_perfect_viral_content(
         self,
         video_path: Path,
@@ -604,7 +1152,8 @@ class ViralClipExtractor:
         self.logger.info(f"📱 Целевые платформы: {', '.join(target_platforms)}")
         self.logger.info(f"🎯 Интенсивность: {intensity:.1f}")
         
-        start_time = asyncio.get_event_loop().time()
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
         
         try:
             if output_dir is None:
@@ -618,7 +1167,7 @@ class ViralClipExtractor:
                 trends_analysis = await self.trend_analyzer.analyze_current_trends(target_platforms)
                 
                 # Сохраняем отчет по трендам
-                trends_report_path = output_dir / f"trends_report_{video_path.stem}.json"
+                trends_report_path = output_dir / f"trends_report_{video_path.stem}.json.gz"
                 self.trend_analyzer.export_trends_report(trends_analysis, trends_report_path)
             
             # =================== ШАГ 2: AI-АНАЛИЗ ВИДЕО ===================
@@ -659,6 +1208,7 @@ class ViralClipExtractor:
             if add_text_overlays:
                 self.logger.info("📝 Шаг 5/6: Добавление вирусных текстовых элементов...")
                 
+                pending_writes = []
                 for platform, content_data in platform_content.items():
                     enhanced_content[platform] = content_data.copy()
                     
@@ -673,21 +1223,23 @@ class ViralClipExtractor:
                                     viral_intensity=intensity
                                 )
                                 
-                                # Сохраняем улучшенную версию
                                 enhanced_path = output_dir / f"{platform}_with_text_{i}.mp4"
-                                await asyncio.get_event_loop().run_in_executor(
-                                    None,
-                                    lambda: enhanced_video.write_videofile(
-                                        str(enhanced_path), 
-                                        codec="libx264", 
-                                        audio_codec="aac",
-                                        verbose=False,
-                                        logger=None
-                                    )
-                                )
-                                
-                                enhanced_content[platform].setdefault("enhanced_versions", []).append(str(enhanced_path))
-                                enhanced_video.close()
+                                pending_writes.append((platform, enhanced_video, enhanced_path))
+                
+                # Сохраняем улучшенные версии параллельно
+                try:
+                    await asyncio.gather(*(
+                        loop.run_in_executor(
+                            _encode_executor, _write_enhanced_video, video, path
+                        )
+                        for _, video, path in pending_writes
+                    ))
+                finally:
+                    for _, video, _ in pending_writes:
+                        video.close()
+                
+                for platform, _, path in pending_writes:
+                    enhanced_content[platform].setdefault("enhanced_versions", []).append(str(path))
             else:
                 enhanced_content = platform_content
             
@@ -733,7 +1285,13 @@ class ViralClipExtractor:
                 final_metadata[platform] = metadata
             
             # =================== СОЗДАНИЕ ФИНАЛЬНОГО ОТЧЕТА ===================
-            processing_time = asyncio.get_event_loop().time() - start_time
+            processing_time = loop.time() - start_time
+            
+            # Итоговые версии по платформам: нужны и для метрик, и для стратегии
+            versions_by_platform = {
+                platform: data.get("enhanced_versions", data.get("main_versions", []))
+                for platform, data in enhanced_content.items()
+            }
             
             final_results = {
                 "source_video": str(video_path),
@@ -756,10 +1314,7 @@ class ViralClipExtractor:
                         platform: adaptation_plans.get(platform, {}).get("estimated_improvement", 0)
                         for platform in target_platforms
                     },
-                    "total_content_pieces": sum(
-                        len(data.get("enhanced_versions", data.get("main_versions", [])))
-                        for data in enhanced_content.values()
-                    ),
+                    "total_content_pieces": sum(map(len, versions_by_platform.values())),
                     "platforms_optimized": len(target_platforms),
                     "ai_systems_used": [
                         "AdvancedVideoAnalyzer",
@@ -773,14 +1328,15 @@ class ViralClipExtractor:
                 
                 # Рекомендации по публикации
                 "publishing_strategy": await self._create_publishing_strategy(
-                    enhanced_content, final_metadata, trends_analysis
+                    versions_by_platform, final_metadata, trends_analysis
                 )
             }
             
             # Сохраняем итоговый отчет
             final_report_path = output_dir / f"PERFECT_VIRAL_CONTENT_{video_path.stem}.json"
-            with open(final_report_path, 'w', encoding='utf-8') as f:
-                json.dump(final_results, f, ensure_ascii=False, indent=2)
+            await loop.run_in_executor(
+                None, final_report_path.write_bytes, _dump_report(final_results, indent=False)
+            )
             
             self.logger.info("=" * 60)
             self.logger.info("🎉 ИДЕАЛЬНЫЙ ВИРУСНЫЙ КОНТЕНТ СОЗДАН!")
@@ -799,11 +1355,15 @@ class ViralClipExtractor:
 
     async def _create_publishing_strategy(
         self,
-        content: Dict[str, Any],
+        versions_by_platform: Dict[str, List[str]],
         metadata: Dict[str, Any],
         trends: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Создание стратегии публикации."""
+        """Создание стратегии публикации.
+
+        ``versions_by_platform`` - итоговые файлы каждой платформы
+        (версии с текстом, если они есть, иначе основные).
+        """
         
         from datetime import datetime, timedelta
         
@@ -821,39 +1381,21 @@ class ViralClipExtractor:
         # Создаем последовательность публикации
         base_time = datetime.now()
         
-        for i, (platform, content_data) in enumerate(content.items()):
-            versions = content_data.get("enhanced_versions", content_data.get("main_versions", []))
+        for i, (platform, versions) in enumerate(versions_by_platform.items()):
+            # Общее для всех версий платформы считаем один раз
+            platform_time = base_time + timedelta(hours=i * 2)
+            platform_metadata = metadata.get(platform, {})
+            expected_performance = "high" if platform in HIGH_PERFORMANCE_PLATFORMS else "medium"
             
             for j, version_path in enumerate(versions):
-                publish_time = base_time + timedelta(hours=i*2, minutes=j*30)
+                publish_time = platform_time + timedelta(minutes=j * 30)
                 
                 strategy["publishing_sequence"].append({
                     "platform": platform,
                     "content_file": version_path,
                     "scheduled_time": publish_time.isoformat(),
-                    "metadata": metadata.get(platform, {}),
-                    "expected_performance": "high" if platform in ["tiktok", "instagram_reels"] else "medium"
+                    "metadata": platform_metadata,
+                    "expected_performance": expected_performance
                 })
         
         return strategy
-
-    def _apply_quality_settings(
-        self, clip: VideoFileClip, quality: VideoQuality
-    ) -> VideoFileClip:
-        """Применение настроек качества."""
-        try:
-            settings = self.quality_settings.get(quality)
-            if not settings:
-                return clip
-
-            target_height = settings["height"]
-
-            # Изменяем размер если нужно
-            if clip.h > target_height:
-                clip = clip.resize(height=target_height)
-
-            return clip
-
-        except Exception as e:
-            logger.warning(f"Ошибка применения настроек качества: {e}")
-            return clip
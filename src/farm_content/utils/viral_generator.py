@@ -3,21 +3,214 @@
 """
 
 import random
-from typing import Dict, List, Optional, Set
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 from farm_content.core import get_logger
 
 logger = get_logger(__name__)
 
+# Призывы к действию по платформам
+_CTA_OPTIONS = MappingProxyType({
+    "tiktok": (
+        "❤️ Лайк если согласен!",
+        "📤 Отправь другу!",
+        "💬 Твое мнение в комментах!",
+        "🔄 Сохрани чтобы не потерять!",
+        "👀 Досмотри до конца!"
+    ),
+    "instagram": (
+        "💝 Сохрани в избранное",
+        "👥 Отметь друзей",
+        "💬 Поделись мнением",
+        "❤️ Двойной тап если нравится",
+        "📩 Пришли в direct"
+    ),
+    "youtube_shorts": (
+        "👍 Лайк и подписка!",
+        "🔔 Включи уведомления",
+        "💬 Пиши в комментариях",
+        "📤 Поделись видео",
+        "👀 Смотри другие видео на канале"
+    )
+})
+
+# Общие рекомендации по времени публикации
+_OPTIMAL_TIMES = MappingProxyType({
+    "tiktok": MappingProxyType({
+        "weekdays": ("19:00", "20:00", "21:00"),
+        "weekends": ("11:00", "14:00", "19:00", "20:00")
+    }),
+    "instagram": MappingProxyType({
+        "weekdays": ("18:00", "19:00", "20:00"),
+        "weekends": ("12:00", "13:00", "19:00")
+    }),
+    "youtube_shorts": MappingProxyType({
+        "weekdays": ("20:00", "21:00", "22:00"),
+        "weekends": ("14:00", "15:00", "20:00")
+    })
+})
+
+# Вступление описания по стилю контента
+_STYLE_INTRO = MappingProxyType({
+    "high_energy": "Этот контент просто ВЗРЫВАЕТ! 🔥",
+    "emotional": "Приготовьте салфетки... 😭💕",
+    "educational": "Полезная информация за несколько минут! 🧠📚"
+})
+
+# Призыв к действию в конце описания для TikTok
+_TIKTOK_DESCRIPTION_TAIL = (
+    "\n\n❤️ Лайк если понравилось! "
+    "📤 Поделись с друзьями! "
+    "💬 Пиши в комментариях что думаешь!"
+)
+
+# Целевая аудитория по типу контента
+_TARGET_AUDIENCES = MappingProxyType({
+    "high_energy": MappingProxyType({
+        "age_range": "16-35",
+        "interests": ("entertainment", "sports", "gaming", "music"),
+        "behavior": "active_users",
+        "engagement_style": "quick_consumption"
+    }),
+    "emotional": MappingProxyType({
+        "age_range": "20-45",
+        "interests": ("relationships", "family", "personal_growth"),
+        "behavior": "thoughtful_viewers",
+        "engagement_style": "deep_engagement"
+    }),
+    "educational": MappingProxyType({
+        "age_range": "18-50",
+        "interests": ("learning", "career", "technology", "science"),
+        "behavior": "knowledge_seekers",
+        "engagement_style": "careful_viewing"
+    })
+})
+
+# Ключевые слова для заголовков: по типу контента, вирусному потенциалу
+# (<=0.6, >0.6, >0.8) и длительности (30-60с, <30с, >60с)
+_CONTENT_KEYWORDS = MappingProxyType({
+    "high_energy": ("экшн", "драйв", "энергия", "адреналин"),
+    "emotional": ("эмоции", "чувства", "душа", "сердце"),
+    "educational": ("знания", "обучение", "факты", "секреты"),
+    "": ()
+})
+_VIRAL_KEYWORDS = ((), ("тренд", "популярное"), ("хит", "бомба", "сенсация"))
+_DURATION_KEYWORDS = ((), ("молниеносно",), ("подробно",))
+_DEFAULT_KEYWORDS = ("контент", "видео", "ролик")
+
+# Все сочетания корзин заранее: выбор ключевых слов - один поиск в словаре
+_KEYWORDS_TABLE = {
+    (content_type, viral_bucket, duration_bucket): (
+        content_words + viral_words + duration_words or _DEFAULT_KEYWORDS
+    )
+    for content_type, content_words in _CONTENT_KEYWORDS.items()
+    for viral_bucket, viral_words in enumerate(_VIRAL_KEYWORDS)
+    for duration_bucket, duration_words in enumerate(_DURATION_KEYWORDS)
+}
+
+# Хештеги, добавляемые к любому контенту
+_UNIVERSAL_HASHTAGS = ("#fyp", "#viral", "#trending")
+
+# Коэффициенты вовлеченности по платформам: views, likes, shares, comments
+_PLATFORM_MULTIPLIERS = MappingProxyType({
+    "tiktok": (1.5, 0.08, 0.03, 0.02),
+    "instagram": (1.0, 0.06, 0.02, 0.015),
+    "youtube_shorts": (1.2, 0.04, 0.01, 0.01)
+})
+
+# Корректировка прогноза на тип контента
+_CONTENT_MULTIPLIERS = MappingProxyType({
+    "high_energy": 1.3,
+    "emotional": 1.1,
+    "educational": 0.9
+})
+
+
+if NUMBA_AVAILABLE:
+
+    @njit(cache=True)
+    def _predict_engagement_core(
+        viral_scores: np.ndarray,
+        random_factors: np.ndarray,
+        content_mults: np.ndarray,
+        multipliers: np.ndarray,
+    ) -> np.ndarray:
+        """Прогноз views/likes/shares/comments для массива клипов (Numba)."""
+        count = viral_scores.shape[0]
+        result = np.empty((count, 4), dtype=np.int64)
+        for i in range(count):
+            base_views = np.floor(
+                1000.0 * viral_scores[i] ** 2 * random_factors[i] * 100.0
+            )
+            views = np.floor(base_views * content_mults[i] * multipliers[0])
+            result[i, 0] = np.int64(views)
+            for j in range(1, 4):
+                result[i, j] = np.int64(np.floor(views * multipliers[j]))
+        return result
+
+else:
+
+    def _predict_engagement_core(
+        viral_scores: np.ndarray,
+        random_factors: np.ndarray,
+        content_mults: np.ndarray,
+        multipliers: np.ndarray,
+    ) -> np.ndarray:
+        """Прогноз views/likes/shares/comments для массива клипов."""
+        base_views = np.floor(1000.0 * viral_scores ** 2 * random_factors * 100.0)
+        views = np.floor(base_views * content_mults * multipliers[0])
+        ratios = np.concatenate(([1.0], multipliers[1:]))
+        return np.floor(views[:, None] * ratios).astype(np.int64)
+
+
+def _freeze_pools(pools: Dict[str, List[str]]) -> Dict[str, Tuple[str, ...]]:
+    """Перевод словаря пулов строк в кортежи."""
+    return {key: tuple(values) for key, values in pools.items()}
+
+
+def _parse_count_range(value: Union[int, str]) -> Tuple[int, int]:
+    """Разбор диапазона вида "3-5" (или одного числа) в пару (min, max)."""
+    if isinstance(value, str) and "-" in value:
+        min_count, max_count = map(int, value.split("-"))
+        return min_count, max_count
+    return int(value), int(value)
+
+
+@dataclass(frozen=True)
+class _PlatformProfile:
+    """Настройки платформы, собранные из всех таблиц генератора один раз."""
+
+    settings: Dict[str, Any]
+    cta_options: Tuple[str, ...]
+    posting_times: Mapping[str, Tuple[str, ...]]
+    engagement_multipliers: Tuple[float, float, float, float]
+
 
 class ViralContentGenerator:
     """Генератор привлекательных заголовков и описаний для вирусного контента."""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
         self.logger = get_logger(f"{__name__}.ViralContentGenerator")
         
-        # Вирусные паттерны заголовков
-        self.title_patterns = {
+        # Собственные генераторы случайных чисел: состояние не делится с
+        # глобальным random, а seed дает воспроизводимый результат. Генератор
+        # NumPy не потокобезопасен - в пуле потоков нужен экземпляр на поток
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed)
+        
+        # Вирусные паттерны заголовков; пулы храним кортежами — они
+        # неизменяемы и только читаются через choice/sample
+        self.title_patterns = _freeze_pools({
             "high_energy": [
                 "🔥 Это ВЗОРВАЛО интернет! {}",
                 "😱 ТЫ НЕ ПОВЕРИШЬ что произошло {}!",
@@ -58,29 +251,35 @@ class ViralContentGenerator:
                 "👻 {} - паранормальное явление",
                 "🗝️ СЕКРЕТ {} раскрыт",
             ]
+        })
+        
+        # Паттерны, заранее разбитые по "{}": заголовок собирается конкатенацией
+        self._title_templates = {
+            style: tuple(tuple(pattern.split("{}")) for pattern in patterns)
+            for style, patterns in self.title_patterns.items()
         }
         
         # Эмоциональные триггеры
-        self.emotional_triggers = {
+        self.emotional_triggers = _freeze_pools({
             "shock": ["ШОКИРУЮЩИЙ", "НЕВЕРОЯТНЫЙ", "БЕЗУМНЫЙ", "ЭКСТРЕМАЛЬНЫЙ"],
             "curiosity": ["СЕКРЕТНЫЙ", "СКРЫТЫЙ", "ЗАПРЕТНЫЙ", "НЕИЗВЕСТНЫЙ"],
             "urgency": ["СРОЧНО", "НЕМЕДЛЕННО", "СЕЙЧАС", "БЫСТРО"],
             "exclusivity": ["ЭКСКЛЮЗИВ", "ТОЛЬКО ДЛЯ ВАС", "ПЕРВЫЕ", "VIP"],
             "social_proof": ["МИЛЛИОНЫ", "ВСЕ СМОТРЯТ", "ТРЕНД", "ВИРУСНО"]
-        }
+        })
         
         # Популярные хештеги по категориям
-        self.hashtag_categories = {
+        self.hashtag_categories = _freeze_pools({
             "viral": ["#вирусное", "#тренд", "#хайп", "#популярное", "#топ"],
             "emotions": ["#эмоции", "#чувства", "#настроение", "#душевно", "#трогательно"],
             "entertainment": ["#развлечения", "#смешно", "#прикол", "#юмор", "#веселье"],
             "lifestyle": ["#жизнь", "#стиль", "#мотивация", "#успех", "#цели"],
             "tech": ["#технологии", "#инновации", "#будущее", "#AI", "#digital"],
             "education": ["#обучение", "#знания", "#образование", "#учеба", "#развитие"]
-        }
+        })
         
         # Платформо-специфичные настройки
-        self.platform_settings = {
+        self.platform_settings: Dict[str, Dict[str, Any]] = {
             "tiktok": {
                 "max_title_length": 150,
                 "optimal_hashtags": "3-5",
@@ -100,6 +299,25 @@ class ViralContentGenerator:
                 "emoji_density": "low"
             }
         }
+        
+        # Диапазоны количества хештегов разбираем один раз
+        for settings in self.platform_settings.values():
+            settings["optimal_hashtags_range"] = _parse_count_range(
+                settings["optimal_hashtags"]
+            )
+        
+        # Все платформенные таблицы разрешаются один раз на платформу
+        self._platform_profiles = {
+            name: _PlatformProfile(
+                settings=settings,
+                cta_options=_CTA_OPTIONS.get(name, _CTA_OPTIONS["tiktok"]),
+                posting_times=_OPTIMAL_TIMES.get(name, _OPTIMAL_TIMES["tiktok"]),
+                engagement_multipliers=_PLATFORM_MULTIPLIERS.get(
+                    name, _PLATFORM_MULTIPLIERS["tiktok"]
+                ),
+            )
+            for name, settings in self.platform_settings.items()
+        }
 
     def generate_viral_metadata(
         self,
@@ -109,26 +327,66 @@ class ViralContentGenerator:
         language: str = "ru"
     ) -> Dict[str, any]:
         """Генерация полных метаданных для вирусного контента."""
+        profile = self._platform_profile(platform)
+        return self._build_metadata(
+            content_analysis,
+            platform,
+            profile,
+            style,
+            self._predict_engagement(content_analysis, profile)
+        )
+
+    def generate_viral_metadata_batch(
+        self,
+        content_analyses: List[Dict],
+        platform: str = "tiktok",
+        style: str = "auto",
+        language: str = "ru"
+    ) -> List[Dict[str, any]]:
+        """Генерация метаданных для набора клипов одной платформы.
+
+        Прогноз вовлеченности считается векторно по всей пачке, текстовые
+        части собираются для каждого клипа как в generate_viral_metadata.
+        """
+        profile = self._platform_profile(platform)
+        predictions = self._predict_engagement_batch(content_analyses, profile)
+        return [
+            self._build_metadata(analysis, platform, profile, style, engagement)
+            for analysis, engagement in zip(content_analyses, predictions)
+        ]
+
+    def _platform_profile(self, platform: str) -> _PlatformProfile:
+        """Профиль платформы (TikTok для неизвестных платформ)."""
+        profile = self._platform_profiles.get(platform)
+        return profile if profile is not None else self._platform_profiles["tiktok"]
+
+    def _build_metadata(
+        self,
+        content_analysis: Dict,
+        platform: str,
+        profile: _PlatformProfile,
+        style: str,
+        engagement: Dict[str, any]
+    ) -> Dict[str, any]:
+        """Сборка метаданных клипа по готовому прогнозу вовлеченности."""
         
         if style == "auto":
             style = content_analysis.get("content_type", "high_energy")
         
-        platform_config = self.platform_settings.get(platform, self.platform_settings["tiktok"])
-        
         # Генерируем заголовок
-        title = self._generate_title(content_analysis, style, platform_config)
+        title = self._generate_title(content_analysis, style, profile.settings)
         
         # Генерируем описание
         description = self._generate_description(content_analysis, style, platform)
         
         # Генерируем хештеги
-        hashtags = self._generate_hashtags(content_analysis, platform_config)
+        hashtags = self._generate_hashtags(content_analysis, profile.settings)
         
         # Генерируем call-to-action
-        cta = self._generate_cta(style, platform)
+        cta = self._generate_cta(style, profile)
         
         # Определяем оптимальное время публикации
-        optimal_time = self._suggest_posting_time(content_analysis, platform)
+        optimal_time = self._suggest_posting_time(content_analysis, profile)
         
         return {
             "title": title,
@@ -138,164 +396,120 @@ class ViralContentGenerator:
             "optimal_posting_time": optimal_time,
             "viral_score": content_analysis.get("viral_score", 0.5),
             "target_audience": self._identify_target_audience(content_analysis),
-            "engagement_predictions": self._predict_engagement(content_analysis, platform)
+            "engagement_predictions": engagement
         }
 
     def _generate_title(self, analysis: Dict, style: str, platform_config: Dict) -> str:
         """Генерация привлекательного заголовка."""
-        try:
-            # Выбираем паттерн заголовка
-            patterns = self.title_patterns.get(style, self.title_patterns["high_energy"])
-            base_pattern = random.choice(patterns)
-            
-            # Определяем ключевые слова на основе анализа
-            keywords = self._extract_keywords_from_analysis(analysis)
-            
-            # Заполняем паттерн
-            if "{}" in base_pattern:
-                keyword = random.choice(keywords) if keywords else "этот контент"
-                title = base_pattern.format(keyword)
-            else:
-                title = base_pattern
-            
-            # Добавляем эмоциональные триггеры
-            title = self._enhance_with_triggers(title, analysis)
-            
-            # Обрезаем до максимальной длины платформы
-            max_length = platform_config.get("max_title_length", 150)
-            if len(title) > max_length:
-                title = title[:max_length-3] + "..."
-            
-            return title
-            
-        except Exception as e:
-            logger.warning(f"Ошибка генерации заголовка: {e}")
+        # Выбираем паттерн заголовка
+        templates = self._title_templates.get(style, self._title_templates["high_energy"])
+        parts = self._rng.choice(templates)
+        
+        # Определяем ключевые слова на основе анализа
+        keywords = self._extract_keywords_from_analysis(analysis)
+        
+        # Заполняем паттерн
+        if len(parts) == 1:
+            title = parts[0]
+        elif len(parts) == 2:
+            keyword = self._rng.choice(keywords) if keywords else "этот контент"
+            title = parts[0] + keyword + parts[1]
+        else:
+            # В паттерне больше одного места для подстановки
             return "🔥 Невероятный контент!"
+        
+        # Добавляем эмоциональные триггеры
+        title = self._enhance_with_triggers(title, analysis)
+        
+        # Обрезаем до максимальной длины платформы
+        max_length = platform_config.get("max_title_length", 150)
+        if len(title) > max_length:
+            title = title[:max_length-3] + "..."
+        
+        return title
 
     def _generate_description(self, analysis: Dict, style: str, platform: str) -> str:
         """Генерация описания контента."""
-        try:
-            description_parts = []
-            
-            # Основное описание
-            if style == "high_energy":
-                description_parts.append("Этот контент просто ВЗРЫВАЕТ! 🔥")
-                if analysis.get("energy_analysis", {}).get("overall_energy", 0) > 0.7:
-                    description_parts.append("Энергетика зашкаливает!")
-            elif style == "emotional":
-                description_parts.append("Приготовьте салфетки... 😭💕")
-            elif style == "educational":
-                description_parts.append("Полезная информация за несколько минут! 🧠📚")
-            
-            # Добавляем детали анализа
-            duration = analysis.get("duration", 0)
-            if duration > 0:
-                description_parts.append(f"⏱️ {int(duration)} секунд чистого удовольствия")
-            
-            # Вирусный потенциал
-            viral_score = analysis.get("viral_score", 0)
-            if viral_score > 0.7:
-                description_parts.append("🚀 Гарантированно станет вирусным!")
-            
-            # Призыв к действию
-            if platform == "tiktok":
-                description_parts.append("\n\n❤️ Лайк если понравилось!")
-                description_parts.append("📤 Поделись с друзьями!")
-                description_parts.append("💬 Пиши в комментариях что думаешь!")
-            
-            return " ".join(description_parts)
-            
-        except Exception as e:
-            logger.warning(f"Ошибка генерации описания: {e}")
-            return "Невероятный контент! Смотри до конца! 🔥"
+        description_parts = []
+        
+        # Основное описание
+        intro = _STYLE_INTRO.get(style)
+        if intro:
+            description_parts.append(intro)
+        if style == "high_energy":
+            energy_analysis = analysis.get("energy_analysis") or {}
+            if energy_analysis.get("overall_energy", 0) > 0.7:
+                description_parts.append("Энергетика зашкаливает!")
+        
+        # Добавляем детали анализа
+        duration = analysis.get("duration", 0)
+        if duration > 0:
+            description_parts.append(f"⏱️ {int(duration)} секунд чистого удовольствия")
+        
+        # Вирусный потенциал
+        viral_score = analysis.get("viral_score", 0)
+        if viral_score > 0.7:
+            description_parts.append("🚀 Гарантированно станет вирусным!")
+        
+        # Призыв к действию
+        if platform == "tiktok":
+            description_parts.append(_TIKTOK_DESCRIPTION_TAIL)
+        
+        return " ".join(description_parts)
 
     def _generate_hashtags(self, analysis: Dict, platform_config: Dict) -> List[str]:
         """Генерация релевантных хештегов."""
-        try:
-            hashtags = set()
-            
-            # Базовые хештеги на основе типа контента
-            content_type = analysis.get("content_type", "high_energy")
-            
-            if content_type == "high_energy":
-                hashtags.update(random.sample(self.hashtag_categories["viral"], 2))
-                hashtags.update(random.sample(self.hashtag_categories["entertainment"], 2))
-            elif content_type == "emotional":
-                hashtags.update(random.sample(self.hashtag_categories["emotions"], 2))
-                hashtags.update(random.sample(self.hashtag_categories["lifestyle"], 1))
-            elif content_type == "educational":
-                hashtags.update(random.sample(self.hashtag_categories["education"], 2))
-                hashtags.update(random.sample(self.hashtag_categories["tech"], 1))
-            
-            # Добавляем универсальные вирусные хештеги
-            hashtags.update(["#fyp", "#viral", "#trending"])
-            
-            # Ограничиваем количество согласно платформе
-            optimal_count = platform_config.get("optimal_hashtags", 5)
-            if isinstance(optimal_count, str) and "-" in optimal_count:
-                min_count, max_count = map(int, optimal_count.split("-"))
-                target_count = random.randint(min_count, max_count)
-            else:
-                target_count = optimal_count
-            
-            # Приводим к нужному количеству
-            hashtags_list = list(hashtags)
-            if len(hashtags_list) > target_count:
-                hashtags_list = random.sample(hashtags_list, target_count)
-            
-            return hashtags_list
-            
-        except Exception as e:
-            logger.warning(f"Ошибка генерации хештегов: {e}")
-            return ["#viral", "#trending", "#fyp"]
-
-    def _generate_cta(self, style: str, platform: str) -> str:
-        """Генерация призыва к действию."""
-        cta_options = {
-            "tiktok": [
-                "❤️ Лайк если согласен!",
-                "📤 Отправь другу!",
-                "💬 Твое мнение в комментах!",
-                "🔄 Сохрани чтобы не потерять!",
-                "👀 Досмотри до конца!"
-            ],
-            "instagram": [
-                "💝 Сохрани в избранное",
-                "👥 Отметь друзей",
-                "💬 Поделись мнением",
-                "❤️ Двойной тап если нравится",
-                "📩 Пришли в direct"
-            ],
-            "youtube_shorts": [
-                "👍 Лайк и подписка!",
-                "🔔 Включи уведомления",
-                "💬 Пиши в комментариях",
-                "📤 Поделись видео",
-                "👀 Смотри другие видео на канале"
-            ]
-        }
+        # Базовые хештеги на основе типа контента
+        content_type = analysis.get("content_type", "high_energy")
+        
+        if content_type == "high_energy":
+            base_tags = (
+                self._rng.sample(self.hashtag_categories["viral"], 2)
+                + self._rng.sample(self.hashtag_categories["entertainment"], 2)
+            )
+        elif content_type == "emotional":
+            base_tags = (
+                self._rng.sample(self.hashtag_categories["emotions"], 2)
+                + self._rng.sample(self.hashtag_categories["lifestyle"], 1)
+            )
+        elif content_type == "educational":
+            base_tags = (
+                self._rng.sample(self.hashtag_categories["education"], 2)
+                + self._rng.sample(self.hashtag_categories["tech"], 1)
+            )
+        else:
+            base_tags = []
+        
+        # Добавляем универсальные вирусные хештеги; dict.fromkeys убирает
+        # повторы, сохраняя порядок добавления
+        hashtags = list(dict.fromkeys([*base_tags, *_UNIVERSAL_HASHTAGS]))
+        
+        # Ограничиваем количество согласно платформе
+        count_range = platform_config.get("optimal_hashtags_range")
+        if count_range is None:
+            count_range = _parse_count_range(
+                platform_config.get("optimal_hashtags", 5)
+            )
+        min_count, max_count = count_range
+        if min_count != max_count:
+            target_count = self._rng.randint(min_count, max_count)
+        else:
+            target_count = min_count
         
-        platform_ctas = cta_options.get(platform, cta_options["tiktok"])
-        return random.choice(platform_ctas)
+        # Приводим к нужному количеству
+        if len(hashtags) > target_count:
+            return self._rng.sample(hashtags, target_count)
+        
+        return hashtags
+
+    def _generate_cta(self, style: str, profile: _PlatformProfile) -> str:
+        """Генерация призыва к действию."""
+        return self._rng.choice(profile.cta_options)
 
-    def _suggest_posting_time(self, analysis: Dict, platform: str) -> Dict[str, any]:
+    def _suggest_posting_time(
+        self, analysis: Dict, profile: _PlatformProfile
+    ) -> Dict[str, any]:
         """Предложение оптимального времени публикации."""
-        # Общие рекомендации по времени
-        optimal_times = {
-            "tiktok": {
-                "weekdays": ["19:00", "20:00", "21:00"],
-                "weekends": ["11:00", "14:00", "19:00", "20:00"]
-            },
-            "instagram": {
-                "weekdays": ["18:00", "19:00", "20:00"],
-                "weekends": ["12:00", "13:00", "19:00"]
-            },
-            "youtube_shorts": {
-                "weekdays": ["20:00", "21:00", "22:00"],
-                "weekends": ["14:00", "15:00", "20:00"]
-            }
-        }
-        
         content_type = analysis.get("content_type", "high_energy")
         
         # Корректировка на основе типа контента
@@ -308,134 +522,127 @@ class ViralContentGenerator:
             }
         elif content_type == "high_energy":
             # Энергичный контент - вечернее время
-            platform_times = optimal_times.get(platform, optimal_times["tiktok"])
             return {
-                "recommended_times": platform_times["weekdays"],
+                "recommended_times": list(profile.posting_times["weekdays"]),
                 "best_days": ["Friday", "Saturday", "Sunday"],
                 "avoid_times": ["morning", "work_hours"]
             }
         else:
-            platform_times = optimal_times.get(platform, optimal_times["tiktok"])
             return {
-                "recommended_times": platform_times["weekends"],
+                "recommended_times": list(profile.posting_times["weekends"]),
                 "best_days": ["any"],
                 "avoid_times": []
             }
 
-    def _extract_keywords_from_analysis(self, analysis: Dict) -> List[str]:
+    def _extract_keywords_from_analysis(self, analysis: Dict) -> Tuple[str, ...]:
         """Извлечение ключевых слов из анализа."""
-        keywords = []
-        
         # На основе типа контента
         content_type = analysis.get("content_type", "")
-        if content_type == "high_energy":
-            keywords.extend(["экшн", "драйв", "энергия", "адреналин"])
-        elif content_type == "emotional":
-            keywords.extend(["эмоции", "чувства", "душа", "сердце"])
-        elif content_type == "educational":
-            keywords.extend(["знания", "обучение", "факты", "секреты"])
+        if content_type not in _CONTENT_KEYWORDS:
+            content_type = ""
         
         # На основе вирусного потенциала
         viral_score = analysis.get("viral_score", 0)
-        if viral_score > 0.8:
-            keywords.extend(["хит", "бомба", "сенсация"])
-        elif viral_score > 0.6:
-            keywords.extend(["тренд", "популярное"])
+        viral_bucket = 2 if viral_score > 0.8 else 1 if viral_score > 0.6 else 0
         
         # На основе продолжительности
         duration = analysis.get("duration", 0)
-        if duration < 30:
-            keywords.append("молниеносно")
-        elif duration > 60:
-            keywords.append("подробно")
+        duration_bucket = 1 if duration < 30 else 2 if duration > 60 else 0
         
-        return keywords if keywords else ["контент", "видео", "ролик"]
+        return _KEYWORDS_TABLE[content_type, viral_bucket, duration_bucket]
 
     def _enhance_with_triggers(self, title: str, analysis: Dict) -> str:
         """Усиление заголовка эмоциональными триггерами."""
-        try:
-            viral_score = analysis.get("viral_score", 0)
-            
-            # Выбираем триггеры на основе вирусного потенциала
-            if viral_score > 0.8:
-                trigger_category = random.choice(["shock", "exclusivity"])
-            elif viral_score > 0.6:
-                trigger_category = random.choice(["curiosity", "social_proof"])
-            else:
-                trigger_category = "urgency"
-            
-            triggers = self.emotional_triggers.get(trigger_category, [])
-            if triggers and random.random() > 0.3:  # 70% вероятность
-                trigger = random.choice(triggers)
-                # Добавляем триггер в начало или заменяем часть
-                if "НЕВЕРОЯТНЫЙ" not in title and "ШОКИРУЮЩИЙ" not in title:
-                    title = f"{trigger} {title}"
-            
-            return title
-            
-        except Exception as e:
-            logger.warning(f"Ошибка добавления триггеров: {e}")
-            return title
+        viral_score = analysis.get("viral_score", 0)
+        
+        # Выбираем триггеры на основе вирусного потенциала
+        if viral_score > 0.8:
+            trigger_category = self._rng.choice(["shock", "exclusivity"])
+        elif viral_score > 0.6:
+            trigger_category = self._rng.choice(["curiosity", "social_proof"])
+        else:
+            trigger_category = "urgency"
+        
+        triggers = self.emotional_triggers.get(trigger_category, ())
+        if triggers and self._rng.random() > 0.3:  # 70% вероятность
+            trigger = self._rng.choice(triggers)
+            # Добавляем триггер в начало или заменяем часть
+            if "НЕВЕРОЯТНЫЙ" not in title and "ШОКИРУЮЩИЙ" not in title:
+                title = f"{trigger} {title}"
+        
+        return title
 
     def _identify_target_audience(self, analysis: Dict) -> Dict[str, any]:
         """Определение целевой аудитории."""
         content_type = analysis.get("content_type", "high_energy")
         
-        audiences = {
-            "high_energy": {
-                "age_range": "16-35",
-                "interests": ["entertainment", "sports", "gaming", "music"],
-                "behavior": "active_users",
-                "engagement_style": "quick_consumption"
-            },
-            "emotional": {
-                "age_range": "20-45",
-                "interests": ["relationships", "family", "personal_growth"],
-                "behavior": "thoughtful_viewers",
-                "engagement_style": "deep_engagement"
-            },
-            "educational": {
-                "age_range": "18-50",
-                "interests": ["learning", "career", "technology", "science"],
-                "behavior": "knowledge_seekers",
-                "engagement_style": "careful_viewing"
-            }
-        }
-        
-        return audiences.get(content_type, audiences["high_energy"])
+        audience = _TARGET_AUDIENCES.get(content_type, _TARGET_AUDIENCES["high_energy"])
+        # Метаданные дополняются и сериализуются вызывающим кодом,
+        # поэтому отдаем копию с обычным списком
+        return {**audience, "interests": list(audience["interests"])}
 
-    def _predict_engagement(self, analysis: Dict, platform: str) -> Dict[str, any]:
+    def _predict_engagement(
+        self, analysis: Dict, profile: _PlatformProfile
+    ) -> Dict[str, any]:
         """Предсказание уровня вовлеченности."""
         viral_score = analysis.get("viral_score", 0.5)
         content_type = analysis.get("content_type", "high_energy")
         
         # Базовые коэффициенты для платформ
-        platform_multipliers = {
-            "tiktok": {"views": 1.5, "likes": 0.08, "shares": 0.03, "comments": 0.02},
-            "instagram": {"views": 1.0, "likes": 0.06, "shares": 0.02, "comments": 0.015},
-            "youtube_shorts": {"views": 1.2, "likes": 0.04, "shares": 0.01, "comments": 0.01}
-        }
-        
-        multipliers = platform_multipliers.get(platform, platform_multipliers["tiktok"])
+        multipliers = profile.engagement_multipliers
+        views_mult, likes_mult, shares_mult, comments_mult = multipliers
         
         # Базовый прогноз просмотров (от 1K до 1M)
-        base_views = int(1000 * (viral_score ** 2) * random.uniform(0.5, 2.0) * 100)
+        base_views = int(1000 * (viral_score ** 2) * self._rng.uniform(0.5, 2.0) * 100)
         
         # Корректировка на тип контента
-        content_multipliers = {
-            "high_energy": 1.3,
-            "emotional": 1.1,
-            "educational": 0.9
-        }
-        
-        content_mult = content_multipliers.get(content_type, 1.0)
-        predicted_views = int(base_views * content_mult * multipliers["views"])
+        content_mult = _CONTENT_MULTIPLIERS.get(content_type, 1.0)
+        predicted_views = int(base_views * content_mult * views_mult)
         
         return {
             "predicted_views": predicted_views,
-            "predicted_likes": int(predicted_views * multipliers["likes"]),
-            "predicted_shares": int(predicted_views * multipliers["shares"]),
-            "predicted_comments": int(predicted_views * multipliers["comments"]),
+            "predicted_likes": int(predicted_views * likes_mult),
+            "predicted_shares": int(predicted_views * shares_mult),
+            "predicted_comments": int(predicted_views * comments_mult),
             "confidence": viral_score,
             "timeframe": "24_hours"
-        }
\ No newline at end of file
+        }
+
+    def _predict_engagement_batch(
+        self, analyses: List[Dict], profile: _PlatformProfile
+    ) -> List[Dict[str, any]]:
+        """Предсказание вовлеченности сразу для набора клипов.
+
+        Арифметика считается одним проходом по массивам, поэтому на больших
+        пачках накладные расходы интерпретатора не растут с числом клипов.
+        """
+        count = len(analyses)
+        viral_scores = np.fromiter(
+            (a.get("viral_score", 0.5) for a in analyses), dtype=np.float64, count=count
+        )
+        content_mults = np.fromiter(
+            (
+                _CONTENT_MULTIPLIERS.get(a.get("content_type", "high_energy"), 1.0)
+                for a in analyses
+            ),
+            dtype=np.float64,
+            count=count,
+        )
+        multipliers = np.asarray(profile.engagement_multipliers, dtype=np.float64)
+        random_factors = self._np_rng.uniform(0.5, 2.0, count)
+        
+        predictions = _predict_engagement_core(
+            viral_scores, random_factors, content_mults, multipliers
+        ).tolist()
+        
+        return [
+            {
+                "predicted_views": views,
+                "predicted_likes": likes,
+                "predicted_shares": shares,
+                "predicted_comments": comments,
+                "confidence": analysis.get("viral_score", 0.5),
+                "timeframe": "24_hours"
+            }
+            for analysis, (views, likes, shares, comments) in zip(analyses, predictions)
+        ]
@@ -3,8 +3,14 @@
 """
 
 import asyncio
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+import ffmpeg
 
 try:
     from moviepy.editor import VideoFileClip
@@ -17,6 +23,137 @@ from farm_content.core import VideoProcessingError, get_logger
 
 logger = get_logger(__name__)
 
+# Без бинарника ffmpeg в PATH эффекты рендерятся через MoviePy (он может
+# использовать собственную сборку ffmpeg из imageio-ffmpeg)
+FFMPEG_BINARY_AVAILABLE = shutil.which("ffmpeg") is not None
+
+# Платформы с вертикальным форматом 9:16
+VERTICAL_PLATFORMS = frozenset({"tiktok", "instagram_reels", "youtube_shorts"})
+
+# Ограничение длительности по платформам, секунд
+PLATFORM_MAX_DURATIONS = {
+    "tiktok": 180,
+    "instagram_reels": 90,
+    "youtube_shorts": 60,
+    "twitter": 140
+}
+DEFAULT_MAX_DURATION = 60
+
+# Аудиокодеки, которые можно скопировать в MP4 без перекодирования
+MP4_COPY_AUDIO_CODECS = frozenset({"aac", "mp3"})
+
+# Кодирование ограничено отдельным пулом: x264 сам многопоточный, и без
+# лимита параллельные вызовы перегружают CPU. Потоки, а не процессы:
+# кодирует подпроцесс ffmpeg, поток только ждет его
+EFFECTS_ENCODE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+EFFECTS_ENCODE_THREADS = max(1, (os.cpu_count() or 2) // EFFECTS_ENCODE_WORKERS)
+_effects_executor = ThreadPoolExecutor(
+    max_workers=EFFECTS_ENCODE_WORKERS, thread_name_prefix="farm-content-effects"
+)
+
+
+def _render_effects_ffmpeg(
+    video_path: Path,
+    output_path: Path,
+    brightness: float,
+    speed: float,
+    vertical: bool,
+    max_duration: float,
+) -> None:
+    """Рендер эффектов единым графом фильтров ffmpeg (без кадров в Python)."""
+    probe = ffmpeg.probe(str(video_path))
+    video_stream = next(s for s in probe["streams"] if s["codec_type"] == "video")
+    audio_stream = next(
+        (s for s in probe["streams"] if s["codec_type"] == "audio"), None
+    )
+    width, height = int(video_stream["width"]), int(video_stream["height"])
+
+    source = ffmpeg.input(str(video_path))
+    video = source.video
+
+    # Яркость: умножение каналов, как multiply_color в MoviePy
+    if brightness != 1.0:
+        video = video.filter(
+            "colorchannelmixer", rr=brightness, gg=brightness, bb=brightness
+        )
+
+    if speed != 1.0:
+        video = video.filter("setpts", f"PTS/{speed}")
+
+    # Центральный кроп 9:16 для горизонтального видео
+    if vertical and width > height:
+        target_w = (height * 9) // 16 // 2 * 2  # libx264 требует чётную ширину
+        x1 = (width - target_w) // 2
+        video = video.filter("crop", target_w, height, x1, 0)
+
+    streams = [video]
+    output_args: Dict[str, Any] = {
+        "vcodec": "libx264",
+        "threads": EFFECTS_ENCODE_THREADS,
+        "t": max_duration,
+    }
+    if audio_stream is not None:
+        audio = source.audio
+        if speed != 1.0:
+            audio = audio.filter("atempo", speed)
+            output_args["acodec"] = "aac"
+        elif audio_stream.get("codec_name") in MP4_COPY_AUDIO_CODECS:
+            # Без изменения скорости звук не трогаем - копируем поток
+            output_args["acodec"] = "copy"
+        else:
+            output_args["acodec"] = "aac"
+        streams.append(audio)
+
+    (
+        ffmpeg
+        .output(*streams, str(output_path), **output_args)
+        .global_args("-hide_banner", "-loglevel", "error")
+        .run(overwrite_output=True)
+    )
+
+
+@lru_cache(maxsize=256)
+def _build_effects_config(
+    preset_items: Tuple[Tuple[str, Any], ...],
+    high_energy: bool,
+    intensity: float,
+) -> Tuple[Tuple[str, Any], ...]:
+    """Расчет конфигурации эффектов из пресета (результат кэшируется)."""
+    config = dict(preset_items)
+    
+    # Для высокоэнергетичного контента увеличиваем эффекты
+    if high_energy:
+        config["brightness_boost"] *= 1.1
+        config["contrast_boost"] *= 1.1
+    
+    # Корректируем интенсивность
+    for key, value in config.items():
+        if isinstance(value, (int, float)) and key.endswith("_boost"):
+            config[key] = 1.0 + (value - 1.0) * intensity
+    
+    return tuple(config.items())
+
+
+@lru_cache(maxsize=256)
+def _render_params(
+    preset_items: Tuple[Tuple[str, Any], ...],
+    platform: str,
+    intensity: float,
+) -> Dict[str, Any]:
+    """Параметры графа ffmpeg для пресета, платформы и интенсивности.
+
+    Результат кэшируется и передается в _render_effects_ffmpeg только как
+    именованные аргументы, поэтому общий словарь не изменяется.
+    """
+    preset = dict(preset_items)
+    speed = preset.get("speed_factor", 1.0) if intensity > 0.5 else 1.0
+    return {
+        "brightness": 1.0 + (preset.get("brightness_boost", 1.0) - 1.0) * intensity,
+        "speed": speed,
+        "vertical": platform in VERTICAL_PLATFORMS,
+        "max_duration": PLATFORM_MAX_DURATIONS.get(platform, DEFAULT_MAX_DURATION),
+    }
+
 
 class VisualEffectsEngine:
     """Упрощенный движок визуальных эффектов для создания привлекательного контента."""
@@ -24,8 +161,8 @@ class VisualEffectsEngine:
     def __init__(self):
         self.logger = get_logger(f"{__name__}.VisualEffectsEngine")
         
-        if not MOVIEPY_AVAILABLE:
-            self.logger.warning("MoviePy не установлен. Визуальные эффекты будут ограничены.")
+        if not (FFMPEG_BINARY_AVAILABLE or MOVIEPY_AVAILABLE):
+            self.logger.warning("ffmpeg и MoviePy недоступны. Визуальные эффекты будут ограничены.")
         
         # Настройки эффектов для разных стилей
         self.effect_presets = {
@@ -58,8 +195,8 @@ class VisualEffectsEngine:
     ) -> Path:
         """Применение вирусных эффектов к видео."""
         
-        if not MOVIEPY_AVAILABLE:
-            self.logger.warning("MoviePy недоступен, возвращаем оригинальное видео")
+        if not (FFMPEG_BINARY_AVAILABLE or MOVIEPY_AVAILABLE):
+            self.logger.warning("ffmpeg и MoviePy недоступны, возвращаем оригинальное видео")
             return video_path
         
         self.logger.info(f"🎨 Применение эффектов для {platform} с интенсивностью {intensity}")
@@ -68,35 +205,23 @@ class VisualEffectsEngine:
             if output_path is None:
                 output_path = video_path.parent / f"{video_path.stem}_enhanced.mp4"
             
-            with VideoFileClip(str(video_path)) as video:
-                enhanced_video = video
-                
-                # Получаем настройки для платформы
-                preset = self.effect_presets.get(f"{platform}_viral", self.effect_presets["tiktok_viral"])
-                
-                # Применяем базовые эффекты
-                enhanced_video = await self._apply_basic_enhancements(
-                    enhanced_video, preset, intensity
-                )
-                
-                # Адаптируем под платформу
-                enhanced_video = await self._adapt_for_platform(
-                    enhanced_video, platform
-                )
-                
-                # Сохраняем результат
-                await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: enhanced_video.write_videofile(
-                        str(output_path),
-                        codec="libx264",
-                        audio_codec="aac",
-                        verbose=False,
-                        logger=None
+            # Получаем настройки для платформы
+            preset = self.effect_presets.get(f"{platform}_viral", self.effect_presets["tiktok_viral"])
+            
+            if FFMPEG_BINARY_AVAILABLE:
+                await asyncio.get_running_loop().run_in_executor(
+                    _effects_executor,
+                    partial(
+                        _render_effects_ffmpeg,
+                        video_path,
+                        output_path,
+                        **_render_params(tuple(preset.items()), platform, intensity)
                     )
                 )
-                
-                enhanced_video.close()
+            else:
+                await self._apply_viral_effects_moviepy(
+                    video_path, output_path, platform, preset, intensity
+                )
             
             self.logger.info(f"✅ Эффекты применены: {output_path}")
             return output_path
@@ -106,6 +231,43 @@ class VisualEffectsEngine:
             # Возвращаем оригинальное видео при ошибке
             return video_path
 
+    async def _apply_viral_effects_moviepy(
+        self,
+        video_path: Path,
+        output_path: Path,
+        platform: str,
+        preset: Dict[str, Any],
+        intensity: float
+    ) -> None:
+        """Применение эффектов через MoviePy (когда ffmpeg нет в PATH)."""
+        
+        with VideoFileClip(str(video_path)) as video:
+            # Применяем базовые эффекты
+            enhanced_video = await self._apply_basic_enhancements(
+                video, preset, intensity
+            )
+            
+            # Адаптируем под платформу
+            enhanced_video = await self._adapt_for_platform(
+                enhanced_video, platform
+            )
+            
+            # Сохраняем результат
+            await asyncio.get_running_loop().run_in_executor(
+                _effects_executor,
+                partial(
+                    enhanced_video.write_videofile,
+                    str(output_path),
+                    codec="libx264",
+                    audio_codec="aac",
+                    threads=EFFECTS_ENCODE_THREADS,
+                    verbose=False,
+                    logger=None
+                )
+            )
+            
+            enhanced_video.close()
+
     async def _apply_basic_enhancements(
         self, 
         video: VideoFileClip, 
@@ -153,18 +315,11 @@ class VisualEffectsEngine:
             adapted = video
             
             # Вертикальный формат для мобильных платформ
-            if platform in ["tiktok", "instagram_reels", "youtube_shorts"]:
+            if platform in VERTICAL_PLATFORMS:
                 adapted = await self._ensure_vertical_format(adapted)
             
             # Ограничение длительности
-            max_durations = {
-                "tiktok": 180,
-                "instagram_reels": 90,
-                "youtube_shorts": 60,
-                "twitter": 140
-            }
-            
-            max_duration = max_durations.get(platform, 60)
+            max_duration = PLATFORM_MAX_DURATIONS.get(platform, DEFAULT_MAX_DURATION)
             if adapted.duration > max_duration:
                 adapted = adapted.subclip(0, max_duration)
             
@@ -180,24 +335,15 @@ class VisualEffectsEngine:
         try:
             w, h = video.size
             
-            # Если уже вертикальное, возвращаем как есть
-            if h > w:
+            # Вертикальное и квадратное видео не трогаем
+            if h >= w:
                 return video
             
-            # Для горизонтального видео делаем центральный кроп
-            if w > h:
-                target_w = int(h * 9 / 16)
-                if target_w <= w:
-                    # Кроп по центру
-                    x_center = w // 2
-                    x1 = x_center - target_w // 2
-                    x2 = x1 + target_w
-                    return video.crop(x1=x1, x2=x2)
-                else:
-                    # Если слишком узкое, просто ресайз
-                    return video.resize(height=h)
-            
-            return video
+            # Для горизонтального видео делаем центральный кроп; ширина 9:16
+            # всегда меньше ширины кадра, так что ресайз не нужен
+            target_w = (h * 9) // 16
+            x1 = (w - target_w) // 2
+            return video.crop(x1=x1, x2=x1 + target_w)
             
         except Exception as e:
             self.logger.warning(f"Ошибка конвертации в вертикальный формат: {e}")
@@ -212,7 +358,7 @@ class VisualEffectsEngine:
     ) -> Path:
         """Применение специфичных для платформы эффектов."""
         
-        if not MOVIEPY_AVAILABLE:
+        if not (FFMPEG_BINARY_AVAILABLE or MOVIEPY_AVAILABLE):
             return video_path
         
         self.logger.info(f"🎯 Применение эффектов для {platform}")
@@ -245,23 +391,15 @@ class VisualEffectsEngine:
             base_config = self.effect_presets.get(
                 f"{platform}_viral", 
                 self.effect_presets["tiktok_viral"]
-            ).copy()
+            )
             
-            # Корректируем на основе анализа контента
-            content_type = content_analysis.get("content_type", "unknown")
+            # От анализа контента зависит только признак высокой энергии,
+            # поэтому различных конфигураций немного и они кэшируются
             energy_level = content_analysis.get("energy_level", 0.5)
             
-            # Для высокоэнергетичного контента увеличиваем эффекты
-            if energy_level > 0.7:
-                base_config["brightness_boost"] *= 1.1
-                base_config["contrast_boost"] *= 1.1
-            
-            # Корректируем интенсивность
-            for key, value in base_config.items():
-                if isinstance(value, (int, float)) and key.endswith("_boost"):
-                    base_config[key] = 1.0 + (value - 1.0) * intensity
-            
-            return base_config
+            return dict(_build_effects_config(
+                tuple(base_config.items()), energy_level > 0.7, intensity
+            ))
             
         except Exception as e:
             logger.warning(f"Ошибка создания конфигурации эффектов: {e}")
@@ -5,9 +5,12 @@
 Создает стабильные видео с фонами и звуком как в примерах
 """
 
-import asyncio
+import math
 import sys
 import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import logging
 import random
@@ -27,89 +30,470 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-def create_stable_viral_video():
+# Настройки кодирования x264: CRF вместо фиксированного битрейта,
+# veryfast в разы быстрее пресета medium по умолчанию
+DEFAULT_PRESET = "veryfast"
+DEFAULT_CRF = 23
+
+# Варианты рендерятся в отдельных процессах; каждый ffmpeg получает свою
+# долю ядер, чтобы параллельные кодировщики не перегружали CPU
+VARIANT_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+# Тексты вариантов: элемент i каждого кортежа относится к видео i
+VARIANT_HOOKS = (
+    "💥 ШОК! 💥\n\nМИЛЛИАРДЕРЫ\nСКРЫВАЛИ ЭТО!",
+    "СТОП! ⚡\n\nТОП СЕКРЕТ\nБОГАЧЕЙ!",
+    "🔥 БОМБА! 🔥\n\nГЛАВНЫЙ\nСЕКРЕТ!",
+)
+VARIANT_INTRIGUES = (
+    "СЕКРЕТНАЯ\nФОРМУЛА\n\nУСПЕХА!",
+    "ТОЛЬКО 1%\nЗНАЮТ\n\nЭТОТ ТРЮК!",
+    "ВСЯ ПРАВДА\nО ДЕНЬГАХ\n\nЗДЕСЬ!",
+)
+VARIANT_CTAS = (
+    "СМОТРИ\nВНИМАТЕЛЬНО!\n\n🚀 ПОДПИШИСЬ! 🚀",
+    "НЕ УПУСТИ\nШАНС!\n\n👆 ЛАЙК! 👆",
+    "ДОСМОТРИ\nДО КОНЦА!\n\n💎 СОХРАНИ! 💎",
+)
+
+# Цветовые схемы вариантов (основной, второй, акцентный цвет)
+MAIN_COLORS = ("red", "orange", "purple")
+SECONDARY_COLORS = ("yellow", "cyan", "gold")
+ACCENT_COLORS = ("lime", "magenta", "white")
+
+# Папка с фоновыми изображениями
+BACKGROUNDS_DIR = Path("viral_assets/backgrounds")
+
+# Шрифты для текста (первый найденный); Pillow ищет их в системных папках
+TEXT_FONTS = (
+    "Arial Bold.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+    "arialbd.ttf",
+    "DejaVuSans-Bold.ttf",
+)
+
+# Буфер канала к ffmpeg: кадр 1080x1920 RGB (~6 МБ) уходит крупными блоками
+PIPE_BUFFER = 1 << 22
+
+# Аппаратные H.264 кодировщики в порядке предпочтения; libx264 - запасной
+HW_ENCODERS = ("h264_videotoolbox", "h264_nvenc")
+
+def _x264_params(crf):
+    """Дополнительные параметры ffmpeg для кодирования x264."""
+    return ["-crf", str(crf), "-threads", "0", "-movflags", "+faststart"]
+
+@lru_cache(maxsize=None)
+def _select_encoder():
+    """
+    Выбирает H.264 кодировщик: первый рабочий аппаратный, иначе libx264.
+    Кандидаты проверяются пробным кодированием один раз за процесс
+    """
+    from moviepy.config import get_setting
+
+    for candidate in HW_ENCODERS:
+        probe = subprocess.run(
+            [
+                get_setting("FFMPEG_BINARY"), "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+                "-c:v", candidate, "-f", "null", "-"
+            ],
+            capture_output=True
+        )
+        if probe.returncode == 0:
+            logger.info(f"⚡ Аппаратное кодирование: {candidate}")
+            return candidate
+    return "libx264"
+
+def _encoder_settings(encoder, preset, crf):
+    """
+    Пресет и параметры ffmpeg для кодировщика (-preset передается всегда)
+    """
+    common = ["-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+    if encoder == "h264_nvenc":
+        return "p4", ["-rc", "vbr", "-cq", str(crf)] + common
+    if encoder == "h264_videotoolbox":
+        return preset, ["-b:v", "6M", "-allow_sw", "1"] + common
+    return preset, _x264_params(crf)
+
+@lru_cache(maxsize=None)
+def _background_files():
+    """
+    Список фонов (один просмотр папки за процесс).
+    После создания новых фонов сбросьте кэш: _background_files.cache_clear()
+    """
+    return tuple(sorted(str(p) for p in BACKGROUNDS_DIR.glob("*.jpg")))
+
+@lru_cache(maxsize=8)
+def _load_background(path, size=(1080, 1920), shade=0.0):
+    """
+    Загружает фон, уже приведенный к размеру кадра (кэш по пути).
+    shade - непрозрачность черного затемнения, запекается в картинку один раз.
+    Массив только для чтения: он общий для всех видео с этим фоном
+    """
+    import cv2
+    import numpy as np
+
+    image = cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2RGB)
+    height, width = image.shape[:2]
+    # Как resize в MoviePy: INTER_AREA для уменьшения, INTER_LINEAR для увеличения
+    if size[0] > width or size[1] > height:
+        interpolation = cv2.INTER_LINEAR
+    else:
+        interpolation = cv2.INTER_AREA
+    frame = cv2.resize(image, size, interpolation=interpolation)
+    if shade:
+        # Затемнение в целых числах: канал * (1 - shade)
+        keep = round(255 * (1 - shade))
+        frame = ((frame.astype(np.uint16) * keep + 127) // 255).astype(np.uint8)
+    frame.setflags(write=False)
+    return frame
+
+def _zoom_clip(frame, duration, rate):
+    """
+    Медленный зум фона: масштаб 1 + rate*t от левого верхнего угла, как
+    resize(lambda t: ...) в композиции. Каждый кадр - срез исходного
+    массива и один cv2.resize до размера кадра, без увеличения всей картинки
+    """
+    import cv2
+    from moviepy.editor import VideoClip
+
+    height, width = frame.shape[:2]
+
+    def make_frame(t):
+        scale = 1 + rate * t
+        visible = frame[:round(height / scale), :round(width / scale)]
+        return cv2.resize(visible, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    return VideoClip(make_frame, duration=duration)
+
+@lru_cache(maxsize=8)
+def _load_audio(path):
+    """
+    Декодирует аудиофайл в стерео-массив float32 один раз (кэш по пути).
+    Возвращает (массив, частота); массив только для чтения
+    """
+    import numpy as np
+
+    try:
+        import soundfile as sf
+    except ImportError:
+        sf = None
+
+    if sf is not None:
+        samples, fps = sf.read(str(path), dtype="float32", always_2d=True)
+    else:
+        from moviepy.editor import AudioFileClip
+
+        fps = 44100
+        with AudioFileClip(str(path), fps=fps) as clip:
+            samples = clip.to_soundarray(fps=fps).astype(np.float32)
+
+    if samples.shape[1] == 1:
+        samples = np.repeat(samples, 2, axis=1)
+    samples = samples[:, :2]
+    samples.setflags(write=False)
+    return samples, fps
+
+def _audio_clip(path, volume, duration=None):
+    """
+    Звуковой клип из декодированного массива: обрезка срезом,
+    громкость - одно векторное умножение вместо volumex на каждый кадр
+    """
+    from moviepy.audio.AudioClip import AudioArrayClip
+
+    samples, fps = _load_audio(path)
+    if duration is not None:
+        samples = samples[:int(fps * duration)]
+    clip = AudioArrayClip(samples * volume, fps=fps)
+    # AudioArrayClip не выставляет end, а CompositeAudioClip без него
+    # не может вычислить длительность
+    return clip.set_duration(clip.duration)
+
+@lru_cache(maxsize=16)
+def _load_font(fontsize):
+    """
+    Загружает жирный шрифт нужного размера
+    """
+    from PIL import ImageFont
+
+    for name in TEXT_FONTS:
+        try:
+            return ImageFont.truetype(name, fontsize)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=fontsize)
+
+def _wrap_text(text, font, width):
+    """
+    Переносит строки по словам, чтобы они помещались в ширину блока
+    """
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return "\n".join(lines)
+
+@lru_cache(maxsize=64)
+def _render_text(text, fontsize, color, width, stroke_color, stroke_width):
+    """
+    Рисует текстовый блок в RGBA-массив через Pillow (кэш по параметрам).
+    Замена TextClip(method='caption'): без вызова ImageMagick на каждый блок
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    font = _load_font(fontsize)
+    text = _wrap_text(text, font, width)
+
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox(
+        (0, 0), text, font=font, anchor="ma", align="center",
+        stroke_width=stroke_width
+    )
+
+    # Слово длиннее блока не переносится - расширяем холст, а не обрезаем
+    canvas_width = max(width, math.ceil(right - left))
+    image = Image.new(
+        "RGBA", (canvas_width, math.ceil(bottom - min(top, 0))), (0, 0, 0, 0)
+    )
+    ImageDraw.Draw(image).multiline_text(
+        (canvas_width / 2, -min(top, 0)), text, font=font, fill=color, anchor="ma",
+        align="center", stroke_width=stroke_width, stroke_fill=stroke_color
+    )
+
+    frame = np.asarray(image)
+    frame.setflags(write=False)
+    return frame
+
+def _encoder_candidates(preset, crf):
+    """
+    Кодировщики по порядку попыток: выбранный, затем libx264 как запасной
+    """
+    encoder = _select_encoder()
+    return [
+        (codec,) + _encoder_settings(codec, preset, crf)
+        for codec in dict.fromkeys((encoder, "libx264"))
+    ]
+
+def _pipe_frames(clip, command, fps):
+    """
+    Передает кадры клипа в stdin ffmpeg без промежуточных копий.
+    Возвращает (код возврата, stderr)
+    """
+    import numpy as np
+
+    proc = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+        bufsize=PIPE_BUFFER
+    )
+    # Времена кадров считаются заранее одним вектором
+    frame_times = np.arange(int(clip.duration * fps)) / fps
+    try:
+        for t in frame_times.tolist():
+            frame = np.ascontiguousarray(clip.get_frame(t), dtype=np.uint8)
+            proc.stdin.write(frame.data)
+        proc.stdin.close()
+    except (BrokenPipeError, OSError):
+        # ffmpeg завершился раньше времени - причина будет в stderr
+        pass
+    stderr = proc.stderr.read()
+    proc.stderr.close()
+    return proc.wait(), stderr.decode(errors="replace").strip()
+
+def _write_video(final_video, output_path, preset, crf, fps=30, threads=None):
+    """
+    Кодирует видео аппаратным кодировщиком, при ошибке - через libx264.
+    Кадры идут в ffmpeg напрямую через канал (без write_videofile),
+    звук клипа пишется во временный WAV и добавляется при кодировании
+    """
+    import tempfile
+    from moviepy.config import get_setting
+
+    width, height = final_video.size
+    with tempfile.TemporaryDirectory() as temp_dir:
+        inputs = [
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", str(fps), "-i", "-"
+        ]
+        maps = ["-map", "0:v"]
+        if final_video.audio is not None:
+            audio_path = str(Path(temp_dir) / "audio.wav")
+            final_video.audio.write_audiofile(audio_path, fps=44100, logger=None)
+            inputs += ["-i", audio_path]
+            maps += ["-map", "1:a", "-c:a", "aac"]
+        # Лимит потоков идет после параметров кодировщика: в них есть
+        # "-threads 0", а ffmpeg берет последнее значение
+        limit = ["-threads", str(threads)] if threads is not None else []
+
+        for codec, encoder_preset, ffmpeg_params in _encoder_candidates(preset, crf):
+            command = (
+                [get_setting("FFMPEG_BINARY"), "-y", "-hide_banner", "-loglevel", "error"]
+                + inputs
+                + maps
+                + ["-c:v", codec, "-preset", encoder_preset, "-pix_fmt", "yuv420p"]
+                + ffmpeg_params
+                + limit
+                + ["-r", str(fps), "-t", str(final_video.duration), str(output_path)]
+            )
+            returncode, error = _pipe_frames(final_video, command, fps)
+            if returncode == 0:
+                return
+            if codec != "libx264":
+                logger.warning(f"⚠️ {codec} не справился ({error}), кодируем через libx264")
+    raise IOError(f"ffmpeg не смог записать видео: {error}")
+
+def _text_png(directory, name, text, fontsize, color, width, stroke_color,
+              stroke_width):
+    """
+    Сохраняет отрисованный текстовый блок в PNG для ffmpeg
+    """
+    from PIL import Image
+
+    path = Path(directory) / f"{name}.png"
+    frame = _render_text(text, fontsize, color, width, stroke_color, stroke_width)
+    Image.fromarray(frame).save(path)
+    return str(path)
+
+def _compose_filter(layers, audio_layers, duration, fps, zoom_rate):
+    """
+    Граф filter_complex: зум фона, затемнение, тексты по времени, микс звука.
+    Входы: 0 - фон, затем картинки слоев, затем звуки
+    """
+    frames = round(duration * fps)
+    graph = [
+        f"[0:v]scale=1080:1920,"
+        f"zoompan=z='1+{zoom_rate}*on/{fps}':x=0:y=0:d={frames}:s=1080x1920:fps={fps},"
+        f"setsar=1,drawbox=c=black@0.4:t=fill[v0]"
+    ]
+    for i, (_, start, end) in enumerate(layers, start=1):
+        graph.append(
+            f"[v{i - 1}][{i}:v]overlay=x=(W-w)/2:y=(H-h)/2:"
+            f"enable='gte(t,{start})*lt(t,{end})'[v{i}]"
+        )
+    graph.append(f"[v{len(layers)}]format=yuv420p[v]")
+
+    first_audio = len(layers) + 1
+    sounds = []
+    for i, (_, volume) in enumerate(audio_layers, start=first_audio):
+        graph.append(f"[{i}:a]volume={volume}[a{i}]")
+        sounds.append(f"[a{i}]")
+    if sounds:
+        # Как CompositeAudioClip: дорожки суммируются без нормализации
+        graph.append(
+            f"{''.join(sounds)}amix=inputs={len(sounds)}:duration=longest:normalize=0[a]"
+        )
+    return ";".join(graph)
+
+def _compose_video(background_path, layers, audio_layers, duration, output_path,
+                   preset, crf, fps=30, zoom_rate=0.02):
+    """
+    Собирает видео одним вызовом ffmpeg: наложение слоев и кодирование идут
+    в filter_complex, без покадровой композиции в Python.
+    layers - [(png, начало, конец)], audio_layers - [(файл, громкость)]
+    """
+    from moviepy.config import get_setting
+
+    inputs = ["-i", str(background_path)]
+    for image_path, _, _ in layers:
+        inputs += ["-i", image_path]
+    for audio_path, _ in audio_layers:
+        inputs += ["-i", str(audio_path)]
+
+    maps = ["-map", "[v]"]
+    if audio_layers:
+        maps += ["-map", "[a]", "-c:a", "aac"]
+
+    graph = _compose_filter(layers, audio_layers, duration, fps, zoom_rate)
+
+    for codec, encoder_preset, ffmpeg_params in _encoder_candidates(preset, crf):
+        result = subprocess.run(
+            [get_setting("FFMPEG_BINARY"), "-y", "-hide_banner", "-loglevel", "error"]
+            + inputs
+            + ["-filter_complex", graph]
+            + maps
+            + ["-c:v", codec, "-preset", encoder_preset]
+            + ffmpeg_params
+            + ["-r", str(fps), "-t", str(duration), str(output_path)],
+            capture_output=True
+        )
+        if result.returncode == 0:
+            return
+        error = result.stderr.decode(errors="replace").strip()
+        if codec != "libx264":
+            logger.warning(f"⚠️ {codec} не справился ({error}), кодируем через libx264")
+    raise IOError(f"ffmpeg не смог собрать видео: {error}")
+
+def create_stable_viral_video(preset=DEFAULT_PRESET, crf=DEFAULT_CRF):
     """
     Создает стабильное видео с фонами и звуком
     """
     try:
         logger.info("🎬 Создаем стабильное вирусное видео...")
         
-        from moviepy.editor import (
-            TextClip, ImageClip, CompositeVideoClip, 
-            AudioFileClip, ColorClip
-        )
-        import numpy as np
-        
-        # Устанавливаем путь к ImageMagick
-        os.environ['IMAGEMAGICK_BINARY'] = '/opt/homebrew/bin/convert'
+        import tempfile
         
         # Проверяем ресурсы
-        backgrounds_dir = Path("viral_assets/backgrounds")
         audio_dir = Path("viral_assets/audio")
+        background_files = _background_files()
         
-        if not backgrounds_dir.exists() or not list(backgrounds_dir.glob("*.jpg")):
+        if not background_files:
             logger.error("❌ Фоновые изображения не найдены!")
             return None
             
         # Выбираем фон
-        background_files = list(backgrounds_dir.glob("*.jpg"))
-        background_path = str(random.choice(background_files))
+        background_path = random.choice(background_files)
         
         logger.info(f"🎨 Используем фон: {Path(background_path).name}")
         
-        # 1. СОЗДАЕМ ФОНОВОЕ ВИДЕО (упрощенное)
-        background = ImageClip(background_path, duration=20)
-        background = background.resize((1080, 1920))
-        
-        # Простой эффект зума (более стабильный)
-        background = background.resize(lambda t: 1 + 0.02*t)
-        
-        # Затемнение для текста
-        overlay = ColorClip(size=(1080, 1920), color=(0, 0, 0))
-        overlay = overlay.set_opacity(0.4).set_duration(20)
+        # 1. ФОН: зум и затемнение для текста делает ffmpeg
+        # (см. _compose_filter)
         
         logger.info("📝 Создаем текстовые элементы...")
         
-        # 2. ТЕКСТОВЫЕ БЛОКИ (упрощенные, стабильные)
+        # 2. ТЕКСТОВЫЕ БЛОКИ - картинки, которые ffmpeg накладывает по времени
+        temp_dir = tempfile.TemporaryDirectory()
         
         # Блок 1: Хук (0-5 сек)
-        hook = TextClip(
+        hook = _text_png(
+            temp_dir.name, "hook",
             "СТОП! 🔥\n\nСЕКРЕТ\nМИЛЛИОНЕРОВ!",
             fontsize=110,
             color='red',
-            font='Arial-Bold',
-            size=(900, None),
-            method='caption',
-            align='center',
+            width=900,
             stroke_color='white',
             stroke_width=3
-        ).set_position('center').set_duration(5).set_start(0)
+        )
         
         # Блок 2: Интрига (5-12 сек)
-        intrigue = TextClip(
+        intrigue = _text_png(
+            temp_dir.name, "intrigue",
             "99% ЛЮДЕЙ\nНЕ ЗНАЮТ\n\nЭТОГО ТРЮКА!",
             fontsize=85,
             color='yellow',
-            font='Arial-Bold',
-            size=(800, None),
-            method='caption',
-            align='center',
+            width=800,
             stroke_color='black',
             stroke_width=2
-        ).set_position('center').set_duration(7).set_start(5)
+        )
         
         # Блок 3: Призыв (12-20 сек)
-        cta = TextClip(
+        cta = _text_png(
+            temp_dir.name, "cta",
             "СМОТРИ\nДО КОНЦА!\n\n👇 ПОДПИШИСЬ 👇",
             fontsize=80,
             color='lime',
-            font='Arial-Bold',
-            size=(850, None),
-            method='caption',
-            align='center',
+            width=850,
             stroke_color='darkgreen',
             stroke_width=2
-        ).set_position('center').set_duration(8).set_start(12)
+        )
+        
+        layers = [(hook, 0, 5), (intrigue, 5, 12), (cta, 12, 20)]
         
         logger.info("🎵 Добавляем звук...")
         
@@ -119,32 +503,18 @@ def create_stable_viral_video():
         # Фоновая музыка
         music_file = audio_dir / "background_electronic.wav"
         if music_file.exists():
-            music = AudioFileClip(str(music_file))
-            music = music.set_duration(20).volumex(0.4)  # Тише
-            audio_clips.append(music)
+            audio_clips.append((music_file, 0.4))  # Тише
             logger.info("✅ Добавлена музыка")
         
         # Звуковые эффекты
         impact_file = audio_dir / "impact.wav"
         if impact_file.exists():
             # Удар в начале
-            impact = AudioFileClip(str(impact_file)).set_start(0).volumex(0.7)
-            audio_clips.append(impact)
+            audio_clips.append((impact_file, 0.7))
             logger.info("✅ Добавлен звуковой эффект")
         
         logger.info("🎬 Собираем финальное видео...")
         
-        # 4. ФИНАЛЬНАЯ СБОРКА
-        video_elements = [background, overlay, hook, intrigue, cta]
-        final_video = CompositeVideoClip(video_elements)
-        
-        # Добавляем звук
-        if audio_clips:
-            from moviepy.editor import CompositeAudioClip
-            final_audio = CompositeAudioClip(audio_clips)
-            final_video = final_video.set_audio(final_audio)
-            logger.info("✅ Звук добавлен")
-        
         # Сохраняем
         output_dir = Path("ready_videos")
         output_dir.mkdir(exist_ok=True)
@@ -155,18 +525,11 @@ def create_stable_viral_video():
         
         logger.info(f"💾 Сохраняем видео: {output_path}")
         
-        # Сохраняем с оптимальными настройками
-        final_video.write_videofile(
-            str(output_path),
-            fps=30,
-            codec='libx264',
-            bitrate="6000k",
-            audio_codec='aac' if audio_clips else None,
-            verbose=False,
-            logger=None,
-            temp_audiofile='temp-audio.m4a' if audio_clips else None,
-            remove_temp=True
-        )
+        # 4. ФИНАЛЬНАЯ СБОРКА одним проходом ffmpeg
+        with temp_dir:
+            _compose_video(
+                background_path, layers, audio_clips, 20, output_path, preset, crf
+            )
         
         file_size = output_path.stat().st_size / 1024 / 1024
         
@@ -174,7 +537,7 @@ def create_stable_viral_video():
         logger.info(f"📁 Файл: {output_path}")
         logger.info(f"📏 Размер: {file_size:.1f} MB")
         logger.info(f"⏱️ Длительность: 20 секунд")
-        logger.info(f"🎯 Качество: Высокое (6000k)")
+        logger.info(f"🎯 Качество: CRF {crf} ({preset})")
         logger.info(f"🎵 Звук: {'ДА' if audio_clips else 'НЕТ'}")
         
         return str(output_path)
@@ -191,149 +554,123 @@ def create_multiple_viral_videos(count=3):
     """
     logger.info(f"🎬 Создаем {count} разных вирусных видео...")
     
-    # Разные варианты текстов
-    video_variants = [
-        {
-            "hook": "💥 ШОК! 💥\n\nМИЛЛИАРДЕРЫ\nСКРЫВАЛИ ЭТО!",
-            "intrigue": "СЕКРЕТНАЯ\nФОРМУЛА\n\nУСПЕХА!",
-            "cta": "СМОТРИ\nВНИМАТЕЛЬНО!\n\n🚀 ПОДПИШИСЬ! 🚀"
-        },
-        {
-            "hook": "СТОП! ⚡\n\nТОП СЕКРЕТ\nБОГАЧЕЙ!",
-            "intrigue": "ТОЛЬКО 1%\nЗНАЮТ\n\nЭТОТ ТРЮК!",
-            "cta": "НЕ УПУСТИ\nШАНС!\n\n👆 ЛАЙК! 👆"
-        },
-        {
-            "hook": "🔥 БОМБА! 🔥\n\nГЛАВНЫЙ\nСЕКРЕТ!",
-            "intrigue": "ВСЯ ПРАВДА\nО ДЕНЬГАХ\n\nЗДЕСЬ!",
-            "cta": "ДОСМОТРИ\nДО КОНЦА!\n\n💎 СОХРАНИ! 💎"
-        }
-    ]
+    variants = range(min(count, len(VARIANT_HOOKS)))
+    if not variants:
+        return []
+    
+    workers = min(len(variants), VARIANT_WORKERS)
+    threads = max(1, (os.cpu_count() or 2) // workers)
+    
+    # Одна метка времени на всю пачку: файлы пачки легко найти вместе
+    from datetime import datetime
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     results = []
     
-    for i in range(min(count, len(video_variants))):
-        logger.info(f"📹 Создаем видео {i+1}/{count}...")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                create_variant_video, i, threads=threads, timestamp=timestamp
+            )
+            for i in variants
+        ]
         
-        try:
-            # Используем тот же код, но с разными текстами
-            result = create_variant_video(i, video_variants[i])
-            if result:
-                results.append(result)
-                logger.info(f"✅ Видео {i+1} готово: {result}")
-            else:
-                logger.warning(f"⚠️ Видео {i+1} не создано")
-        except Exception as e:
-            logger.error(f"❌ Ошибка в видео {i+1}: {e}")
+        for i, future in enumerate(futures):
+            logger.info(f"📹 Ждем видео {i+1}/{count}...")
+            
+            try:
+                result = future.result()
+                if result:
+                    results.append(result)
+                    logger.info(f"✅ Видео {i+1} готово: {result}")
+                else:
+                    logger.warning(f"⚠️ Видео {i+1} не создано")
+            except Exception as e:
+                logger.error(f"❌ Ошибка в видео {i+1}: {e}")
     
     return results
 
-def create_variant_video(index, texts):
+def create_variant_video(index, preset=DEFAULT_PRESET, crf=DEFAULT_CRF, threads=None,
+                         timestamp=None):
     """
-    Создает вариант видео с определенными текстами
+    Создает вариант видео с текстами из VARIANT_* под номером index
+    (threads ограничивает потоки ffmpeg при параллельном рендере,
+    timestamp - общая метка времени пачки для имени файла)
     """
     try:
-        from moviepy.editor import (
-            TextClip, ImageClip, CompositeVideoClip, 
-            AudioFileClip, ColorClip
-        )
-        
-        os.environ['IMAGEMAGICK_BINARY'] = '/opt/homebrew/bin/convert'
+        from viral_compositor import composite_clip
         
         # Выбираем фон
-        backgrounds_dir = Path("viral_assets/backgrounds") 
-        background_files = list(backgrounds_dir.glob("*.jpg"))
+        background_files = _background_files()
         if not background_files:
             return None
         
-        background_path = str(background_files[index % len(background_files)])
-        
-        # Фоновое видео
-        background = ImageClip(background_path, duration=18)
-        background = background.resize((1080, 1920))
-        background = background.resize(lambda t: 1 + 0.01*t)
+        background_path = background_files[index % len(background_files)]
         
-        # Затемнение
-        overlay = ColorClip(size=(1080, 1920), color=(0, 0, 0))
-        overlay = overlay.set_opacity(0.35).set_duration(18)
-        
-        # Цветовые схемы для разных видео
-        colors = [
-            {"main": "red", "secondary": "yellow", "accent": "lime"},
-            {"main": "orange", "secondary": "cyan", "accent": "magenta"},
-            {"main": "purple", "secondary": "gold", "accent": "white"}
-        ]
+        # Фоновое видео; затемнение под текст уже запечено в картинку
+        background = _zoom_clip(
+            _load_background(background_path, shade=0.35), 18, 0.01
+        )
         
-        color_scheme = colors[index % len(colors)]
+        # Цветовая схема варианта
+        scheme = index % len(MAIN_COLORS)
         
         # Создаем текстовые блоки
-        hook = TextClip(
-            texts["hook"],
+        hook = _render_text(
+            VARIANT_HOOKS[index],
             fontsize=100,
-            color=color_scheme["main"],
-            font='Arial-Bold',
-            size=(900, None),
-            method='caption',
-            align='center',
+            color=MAIN_COLORS[scheme],
+            width=900,
             stroke_color='white',
             stroke_width=3
-        ).set_position('center').set_duration(6).set_start(0)
+        )
         
-        intrigue = TextClip(
-            texts["intrigue"],
+        intrigue = _render_text(
+            VARIANT_INTRIGUES[index],
             fontsize=80,
-            color=color_scheme["secondary"],
-            font='Arial-Bold',
-            size=(800, None),
-            method='caption',
-            align='center',
+            color=SECONDARY_COLORS[scheme],
+            width=800,
             stroke_color='black',
             stroke_width=2
-        ).set_position('center').set_duration(6).set_start(6)
+        )
         
-        cta = TextClip(
-            texts["cta"],
+        cta = _render_text(
+            VARIANT_CTAS[index],
             fontsize=75,
-            color=color_scheme["accent"],
-            font='Arial-Bold',
-            size=(850, None),
-            method='caption',
-            align='center',
+            color=ACCENT_COLORS[scheme],
+            width=850,
             stroke_color='darkblue',
             stroke_width=2
-        ).set_position('center').set_duration(6).set_start(12)
+        )
         
-        # Собираем видео
-        video_elements = [background, overlay, hook, intrigue, cta]
-        final_video = CompositeVideoClip(video_elements)
+        # Собираем видео: тексты накладываются прямо в кадр фона
+        layers = [(hook, 0, 6), (intrigue, 6, 12), (cta, 12, 18)]
+        final_video = composite_clip(background, layers)
         
         # Добавляем звук если доступен
         audio_dir = Path("viral_assets/audio")
         music_file = audio_dir / "background_electronic.wav"
         
         if music_file.exists():
-            music = AudioFileClip(str(music_file))
-            music = music.set_duration(18).volumex(0.3)
+            music = _audio_clip(music_file, 0.3, duration=18)
             final_video = final_video.set_audio(music)
         
         # Сохраняем
         output_dir = Path("ready_videos")
         output_dir.mkdir(exist_ok=True)
         
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if timestamp is None:
+            from datetime import datetime
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_path = output_dir / f"VIRAL_VARIANT_{index+1}_{timestamp}.mp4"
         
-        final_video.write_videofile(
-            str(output_path),
+        _write_video(
+            final_video,
+            output_path,
+            preset,
+            crf,
             fps=30,
-            codec='libx264', 
-            bitrate="5000k",
-            audio_codec='aac',
-            verbose=False,
-            logger=None,
-            temp_audiofile='temp-audio.m4a',
-            remove_temp=True
+            threads=threads
         )
         
         return str(output_path)
@@ -361,14 +698,14 @@ def main():
     # Проверяем ресурсы
     logger.info("📂 Проверяем ресурсы...")
     
-    backgrounds_dir = Path("viral_assets/backgrounds")
     audio_dir = Path("viral_assets/audio")
     
-    if not backgrounds_dir.exists() or not list(backgrounds_dir.glob("*.jpg")):
+    if not _background_files():
         logger.info("📥 Создаем фоновые изображения...")
         try:
             from advanced_viral_generator import download_background_images
             download_background_images()
+            _background_files.cache_clear()
         except:
             logger.error("❌ Не удалось создать фоны")
             return
@@ -416,8 +753,8 @@ def main():
         # Открываем папку
         open_folder = input("\n🗂️ Открыть папку с видео? (y/n): ").strip().lower()
         if open_folder == 'y':
-            import subprocess
-            subprocess.run(["open", "ready_videos"])
+            # Не ждем, пока файловый менеджер откроется
+            subprocess.Popen(["open", "ready_videos"], start_new_session=True)
     else:
         print("\n❌ К сожалению, видео не были созданы.")
 
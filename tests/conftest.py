@@ -2,11 +2,6 @@
 Конфигурация pytest.
 """
 
-import asyncio
-import os
-import tempfile
-from pathlib import Path
-
 import pytest
 
 
@@ -20,32 +15,32 @@ def pytest_configure(config):
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Создание event loop для асинхронных тестов."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def temp_dir(tmp_path_factory):
+    """Временная директория для тестов."""
+    return tmp_path_factory.mktemp("farm_content")
 
 
 @pytest.fixture(scope="session")
-def temp_dir():
-    """Временная директория для тестов."""
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        yield Path(tmp_dir)
+def video_analyzer():
+    """Анализатор видео (один на сессию)."""
+    from farm_content.utils import VideoAnalyzer
+
+    return VideoAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def clip_extractor():
+    """Экстрактор клипов (один на сессию)."""
+    from farm_content.utils import ClipExtractor
+
+    return ClipExtractor()
 
 
 @pytest.fixture(autouse=True)
-def setup_test_environment(temp_dir):
+def setup_test_environment(temp_dir, monkeypatch):
     """Настройка тестового окружения."""
-    # Устанавливаем переменные окружения для тестов
-    os.environ["FARM_CONTENT_DATA_DIR"] = str(temp_dir / "data")
-    os.environ["FARM_CONTENT_LOGS_DIR"] = str(temp_dir / "logs")
-    os.environ["FARM_CONTENT_CONFIG_DIR"] = str(temp_dir / "config")
-    os.environ["FARM_CONTENT_DEBUG"] = "true"
-
-    yield
-
-    # Очищаем переменные окружения после тестов
-    for key in list(os.environ.keys()):
-        if key.startswith("FARM_CONTENT_"):
-            del os.environ[key]
+    # Переменные окружения для тестов; monkeypatch вернет их после теста
+    monkeypatch.setenv("FARM_CONTENT_DATA_DIR", str(temp_dir / "data"))
+    monkeypatch.setenv("FARM_CONTENT_LOGS_DIR", str(temp_dir / "logs"))
+    monkeypatch.setenv("FARM_CONTENT_CONFIG_DIR", str(temp_dir / "config"))
+    monkeypatch.setenv("FARM_CONTENT_DEBUG", "true")
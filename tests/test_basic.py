@@ -2,29 +2,39 @@
 Базовые тесты для Farm Content.
 """
 
-import tempfile
-from pathlib import Path
-
 import pytest
 
 from farm_content.core import Settings, get_logger
 from farm_content.services import URLProcessorService
 
-
-@pytest.fixture
-def temp_settings():
-    """Временные настройки для тестов."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-        settings = Settings(
-            data_dir=temp_path / "data",
-            logs_dir=temp_path / "logs",
-            config_dir=temp_path / "config",
-        )
-        yield settings
-
-
-@pytest.fixture
+VALID_URLS = (
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+)
+
+INVALID_URLS = (
+    "https://example.com",
+    "https://youtube.com/watch",
+    "https://youtu.be/",
+    "not_a_url",
+    "",
+)
+
+
+@pytest.fixture(scope="module")
+def temp_settings(tmp_path_factory):
+    """Временные настройки для тестов (одни на модуль)."""
+    temp_path = tmp_path_factory.mktemp("settings")
+    return Settings(
+        data_dir=temp_path / "data",
+        logs_dir=temp_path / "logs",
+        config_dir=temp_path / "config",
+    )
+
+
+@pytest.fixture(scope="session")
 def url_processor():
     """URL процессор для тестов."""
     return URLProcessorService()
@@ -55,30 +65,15 @@ class TestCore:
 class TestURLProcessor:
     """Тесты URL процессора."""
 
-    def test_url_validation(self, url_processor):
-        """Тест валидации URL."""
-        # Валидные URL
-        valid_urls = [
-            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
-            "https://youtube.com/watch?v=dQw4w9WgXcQ",
-            "https://youtu.be/dQw4w9WgXcQ",
-            "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
-        ]
-
-        for url in valid_urls:
-            assert url_processor.validate_url(url), f"URL should be valid: {url}"
-
-        # Невалидные URL
-        invalid_urls = [
-            "https://example.com",
-            "https://youtube.com/watch",
-            "https://youtu.be/",
-            "not_a_url",
-            "",
-        ]
-
-        for url in invalid_urls:
-            assert not url_processor.validate_url(url), f"URL should be invalid: {url}"
+    @pytest.mark.parametrize("url", VALID_URLS)
+    def test_valid_url(self, url_processor, url):
+        """Тест валидных URL."""
+        assert url_processor.validate_url(url), f"URL should be valid: {url}"
+
+    @pytest.mark.parametrize("url", INVALID_URLS)
+    def test_invalid_url(self, url_processor, url):
+        """Тест невалидных URL."""
+        assert not url_processor.validate_url(url), f"URL should be invalid: {url}"
 
     @pytest.mark.asyncio
     async def test_video_info_extraction(self, url_processor):
@@ -0,0 +1,85 @@
+# 🎞️ БЫСТРАЯ КОМПОЗИЦИЯ КАДРОВ ДЛЯ ВИРУСНЫХ ВИДЕО
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _blend_core(dst, src):
+        """Накладывает RGBA-картинку на RGB-кадр того же размера на месте"""
+        height, width = src.shape[:2]
+        for i in prange(height):
+            for j in range(width):
+                alpha = np.int32(src[i, j, 3])
+                if alpha == 0:
+                    continue
+                for c in range(3):
+                    dst[i, j, c] = (
+                        dst[i, j, c] * (255 - alpha) + src[i, j, c] * alpha + 127
+                    ) // 255
+
+else:
+
+    def _blend_core(dst, src):
+        """Накладывает RGBA-картинку на RGB-кадр того же размера на месте"""
+        alpha = src[..., 3:].astype(np.uint16)
+        dst[...] = (
+            dst.astype(np.uint16) * (255 - alpha) + src[..., :3] * alpha + 127
+        ) // 255
+
+def blend_rgba(frame, image, top, left):
+    """
+    Накладывает RGBA-картинку на RGB-кадр (uint8) в позицию (top, left).
+    Целочисленная арифметика; выходящие за кадр части отбрасываются
+    """
+    height, width = frame.shape[:2]
+    y0, x0 = max(top, 0), max(left, 0)
+    y1 = min(top + image.shape[0], height)
+    x1 = min(left + image.shape[1], width)
+    if y0 >= y1 or x0 >= x1:
+        return frame
+
+    _blend_core(
+        frame[y0:y1, x0:x1],
+        image[y0 - top:y1 - top, x0 - left:x1 - left]
+    )
+    return frame
+
+def composite_clip(background, layers):
+    """
+    Клип из фона и RGBA-картинок по центру кадра.
+    Заменяет CompositeVideoClip: кадр собирается на месте в uint8,
+    без float-блиттинга каждого слоя. Затемнение фона запекается
+    заранее (_load_background в stable_viral_generator).
+    layers - [(картинка, начало, конец)]
+    """
+    from moviepy.editor import VideoClip
+
+    width, height = background.size
+
+    # Позиции слоев не зависят от времени - считаем их один раз
+    placed = tuple(
+        (
+            image, start, end,
+            (height - image.shape[0]) // 2,
+            (width - image.shape[1]) // 2
+        )
+        for image, start, end in layers
+    )
+
+    def make_frame(t):
+        frame = background.get_frame(t)
+        if not frame.flags.writeable:
+            frame = frame.copy()
+        for image, start, end, top, left in placed:
+            if start <= t < end:
+                blend_rgba(frame, image, top, left)
+        return frame
+
+    return VideoClip(make_frame, duration=background.duration)